@@ -0,0 +1,61 @@
+"""ETag / Last-Modified support for APIView and async view GET handlers."""
+from calendar import timegm
+from functools import wraps
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def conditional_get(method):
+    """Answer If-None-Match / If-Modified-Since before running the handler.
+
+    The view supplies ``get_validators(request, *args, **kwargs)`` returning an
+    ``(etag, last_modified)`` pair, or None when the resource has no cheap
+    validators. A matching request gets a 304 without touching the serializers.
+    """
+
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        validators = self.get_validators(request, *args, **kwargs)
+        if validators is None:
+            return method(self, request, *args, **kwargs)
+
+        etag, last_modified = _quote(validators)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            request.conditional_etag = etag  # Part of the response cache key.
+            response = method(self, request, *args, **kwargs)
+        return _stamp(response, etag, last_modified)
+
+    return wrapper
+
+
+def async_conditional_get(method):
+    """conditional_get for async handlers; ``get_validators`` is awaited."""
+
+    @wraps(method)
+    async def wrapper(self, request, *args, **kwargs):
+        validators = await self.get_validators(request, *args, **kwargs)
+        if validators is None:
+            return await method(self, request, *args, **kwargs)
+
+        etag, last_modified = _quote(validators)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            request.conditional_etag = etag  # Part of the response cache key.
+            response = await method(self, request, *args, **kwargs)
+        return _stamp(response, etag, last_modified)
+
+    return wrapper
+
+
+def _quote(validators):
+    etag, last_modified = validators
+    return quote_etag(etag), timegm(last_modified.utctimetuple())
+
+
+def _stamp(response, etag, last_modified):
+    if response.status_code in (200, 304):
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+    return response
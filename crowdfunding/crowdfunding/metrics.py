@@ -0,0 +1,201 @@
+"""Per-view request metrics: query count, database time, render time, total.
+
+A sample of requests (settings.METRICS_SAMPLE_RATE) is measured. Those get a
+Server-Timing header, which browser dev tools show, and feed per-view
+histograms that /metrics/ serves in the Prometheus text format. Queries are
+timed by an execute wrapper on every connection; it only checks a context
+variable for requests that aren't sampled. Histograms are per process, so
+scrape each worker or read them as one worker's share.
+"""
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from rest_framework import permissions
+from rest_framework.views import APIView
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+_sample = ContextVar("metrics_sample", default=None)
+
+
+class Sample:
+    __slots__ = ("started", "queries", "db", "render_started", "render")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.render_started = None
+        self.render = None
+
+
+class Histogram:
+    def __init__(self, name, help, buckets):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, view, value):
+        with self._lock:
+            series = self._series.setdefault(view, [0] * len(self.buckets) + [0, 0.0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {view: list(values) for view, values in sorted(self._series.items())}
+        for view, values in series.items():
+            label = view.replace("\\", "\\\\").replace('"', '\\"')
+            for bound, count in zip(self.buckets, values):
+                lines.append(f'{self.name}_bucket{{view="{label}",le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{view="{label}",le="+Inf"}} {values[-2]}')
+            lines.append(f'{self.name}_sum{{view="{label}"}} {values[-1]}')
+            lines.append(f'{self.name}_count{{view="{label}"}} {values[-2]}')
+        return lines
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+REQUEST_SECONDS = Histogram("crowdfunding_request_duration_seconds", "Time to build the response.", DURATION_BUCKETS)
+DB_SECONDS = Histogram("crowdfunding_db_duration_seconds", "Time spent in database queries.", DURATION_BUCKETS)
+RENDER_SECONDS = Histogram("crowdfunding_render_duration_seconds", "Time to render DRF responses.", DURATION_BUCKETS)
+QUERIES = Histogram("crowdfunding_db_queries", "Database queries per request.", QUERY_BUCKETS)
+HISTOGRAMS = (REQUEST_SECONDS, DB_SECONDS, RENDER_SECONDS, QUERIES)
+
+
+def expose():
+    return "\n".join(line for histogram in HISTOGRAMS for line in histogram.expose()) + "\n"
+
+
+def reset():
+    for histogram in HISTOGRAMS:
+        histogram.reset()
+
+
+def record_query(execute, sql, params, many, context):
+    sample = _sample.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        sample.queries += 1
+        sample.db += time.perf_counter() - started
+
+
+def install(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+# New connections in any thread, e.g. the per-request threads of async views.
+connection_created.connect(install, dispatch_uid="crowdfunding.metrics.install")
+
+
+def view_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unresolved"
+    view_class = getattr(match.func, "view_class", None)
+    return view_class.__name__ if view_class is not None else match.func.__name__
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+            self.process_template_response = self.aprocess_template_response
+
+    def sampled(self):
+        rate = settings.METRICS_SAMPLE_RATE
+        return rate > 0 and (rate >= 1 or random.random() < rate)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        # Connections this thread opened before this module was imported.
+        for connection in connections.all(initialized_only=True):
+            install(connection)
+        sample = Sample()
+        token = _sample.set(sample)
+        try:
+            response = self.get_response(request)
+        finally:
+            _sample.reset(token)
+        return self.finish(request, response, sample)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        sample = Sample()
+        token = _sample.set(sample)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _sample.reset(token)
+        return self.finish(request, response, sample)
+
+    def process_template_response(self, request, response):
+        return self.time_render(response)
+
+    async def aprocess_template_response(self, request, response):
+        # __init__ points process_template_response here in async mode.
+        return self.time_render(response)
+
+    def time_render(self, response):
+        # DRF responses render after the view returns; time that separately.
+        sample = _sample.get()
+        if sample is not None:
+            sample.render_started = time.perf_counter()
+            response.add_post_render_callback(lambda response: self.rendered(sample))
+        return response
+
+    def rendered(self, sample):
+        sample.render = time.perf_counter() - sample.render_started
+
+    def finish(self, request, response, sample):
+        total = time.perf_counter() - sample.started
+        view = view_name(request)
+        REQUEST_SECONDS.observe(view, total)
+        DB_SECONDS.observe(view, sample.db)
+        QUERIES.observe(view, sample.queries)
+        timings = [f'db;dur={sample.db * 1000:.1f};desc="{sample.queries} queries"']
+        if sample.render is not None:
+            RENDER_SECONDS.observe(view, sample.render)
+            timings.append(f"render;dur={sample.render * 1000:.1f}")
+        timings.append(f"total;dur={total * 1000:.1f}")
+        response["Server-Timing"] = ", ".join(timings)
+        return response
+
+
+class Metrics(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(expose(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,154 @@
+"""Publish/subscribe fan-out for server-sent events.
+
+Subscribers are async streams in this process, each with its own bounded
+queue. Publishers may be sync code in any thread (signal handlers, commands);
+messages are handed to each subscriber's event loop thread-safely. One
+publish costs a queue put per open stream, with no database work.
+
+With settings.EVENTS_BRIDGE = "postgres", publish() sends a NOTIFY instead,
+and every process that has subscribers runs a LISTEN thread that feeds its
+local broker. That way a pledge taken by one worker, or a fundraiser closed
+by the scheduler process, reaches streams held open by every other worker.
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "crowdfunding_events"
+
+
+class Subscription:
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+
+    def put(self, message):
+        self.loop.call_soon_threadsafe(self._put, message)
+
+    def _put(self, message):
+        # A slow client loses its oldest event rather than holding memory.
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, channel, maxsize=100):
+        subscription = Subscription(self, channel, maxsize)
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        delivered = 0
+        for subscription in subscriptions:
+            try:
+                subscription.put(message)
+                delivered += 1
+            except RuntimeError:
+                # Its event loop has shut down.
+                self.unsubscribe(subscription)
+        return delivered
+
+    def subscriber_count(self, channel=None):
+        with self._lock:
+            if channel is not None:
+                return len(self._subscriptions.get(channel, ()))
+            return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+
+class PostgresBridge:
+    """Carries published messages between processes with LISTEN/NOTIFY (psycopg 3)."""
+
+    def __init__(self, broker, using="default"):
+        self.broker = broker
+        self.using = using
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        payload = json.dumps({"channel": channel, "message": message}, cls=DjangoJSONEncoder)
+        with connections[self.using].cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [NOTIFY_CHANNEL, payload])
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self.listen, name="pubsub-listener", daemon=True)
+                self._thread.start()
+
+    def listen(self):
+        while True:
+            raw = None
+            try:
+                raw = self.connect()
+                raw.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                while True:
+                    for notify in raw.notifies(timeout=30):
+                        event = json.loads(notify.payload)
+                        self.broker.publish(event["channel"], event["message"])
+            except Exception:
+                logger.exception("Event listener lost its connection; reconnecting.")
+            finally:
+                if raw is not None:
+                    raw.close()
+            threading.Event().wait(1)
+
+    def connect(self):
+        # A connection of its own rather than one from Django (or its pool):
+        # it stays in LISTEN for the life of the process.
+        wrapper = connections[self.using]
+        raw = wrapper.Database.connect(**wrapper.get_connection_params())
+        raw.autocommit = True
+        return raw
+
+
+broker = Broker()
+bridge = PostgresBridge(broker)
+
+
+def bridged():
+    return getattr(settings, "EVENTS_BRIDGE", "") == "postgres"
+
+
+def publish(channel, message):
+    if bridged():
+        bridge.publish(channel, message)
+    else:
+        broker.publish(channel, message)
+
+
+def subscribe(channel, maxsize=100):
+    if bridged():
+        bridge.start()
+    return broker.subscribe(channel, maxsize)
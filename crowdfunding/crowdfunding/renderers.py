@@ -0,0 +1,88 @@
+"""JSON renderer backed by orjson or msgspec when either is installed.
+
+The output matches DRF's JSONRenderer with the default settings (compact,
+UTF-8, U+2028/U+2029 escaped). Anything the fast encoder can't handle
+identically goes to the stdlib path: indented output, non-default JSON
+settings, values the encoder rejects. Neither library is required.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+_default = JSONEncoder().default
+
+
+def _orjson_dumps(data):
+    # Dates and times go through DRF's encoder so their text is identical.
+    return orjson.dumps(
+        data,
+        default=_default,
+        option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+    )
+
+
+def _msgspec_encoder():
+    # msgspec encodes datetimes itself, in the same RFC 3339 form as DRF
+    # (UTC as "Z"). Decimals stay numbers, as with DRF, but keep their own
+    # digits ("1.10") where DRF goes through float ("1.1").
+    return msgspec.json.Encoder(enc_hook=_default, decimal_format="number").encode
+
+
+def _encode_errors():
+    errors = (TypeError, ValueError, OverflowError)
+    if msgspec is not None:
+        errors += (msgspec.EncodeError,)
+    return errors
+
+
+def available_backends():
+    backends = {}
+    if orjson is not None:
+        backends["orjson"] = _orjson_dumps
+    if msgspec is not None:
+        backends["msgspec"] = _msgspec_encoder()
+    return backends
+
+
+ENCODE_ERRORS = _encode_errors()
+
+
+class FastJSONRenderer(JSONRenderer):
+    # First installed backend wins; "json" means DRF's own rendering.
+    backends = ("orjson", "msgspec")
+
+    def __init__(self):
+        installed = available_backends()
+        self.backend = next((name for name in self.backends if name in installed), "json")
+        self.dumps = installed.get(self.backend)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if self.dumps is None or not self.uses_default_format(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = self.dumps(data)
+        except ENCODE_ERRORS:
+            # e.g. integers wider than 64 bits; the stdlib handles them.
+            return super().render(data, accepted_media_type, renderer_context)
+        # Same escaping as JSONRenderer, for embedding in JavaScript.
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+
+    def uses_default_format(self, accepted_media_type, renderer_context):
+        return (
+            self.get_indent(accepted_media_type, renderer_context) is None
+            and not self.ensure_ascii
+            and self.compact
+            and self.strict
+            and self.encoder_class is JSONEncoder
+        )
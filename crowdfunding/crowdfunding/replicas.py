@@ -0,0 +1,98 @@
+"""Read-replica routing for the fundraisers and users endpoints.
+
+replica_middleware picks a replica (from settings.REPLICA_DATABASES) for
+GET/HEAD/OPTIONS requests to views in those apps, and ReplicaRouter sends
+that request's reads of their models there. Everything else uses the
+primary: writes, reads of other apps' models (tokens, sessions), commands,
+and any request from a client that wrote within the last
+REPLICA_STICKY_SECONDS, so clients read their own writes despite
+replication lag. Clients are told apart by their Authorization header, or
+by address when they send none; the sticky marks live in the default
+cache, so workers only share them if that cache is shared.
+"""
+import hashlib
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.urls import Resolver404, resolve
+from django.utils.decorators import sync_and_async_middleware
+
+APPS = {"fundraisers", "users"}
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+_replica = ContextVar("replica", default=None)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _replica.get()
+        if alias is not None and model._meta.app_label in APPS:
+            return alias
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Explicit, or Django would write back to whichever database an
+        # instance was read from.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        databases = {DEFAULT_DB_ALIAS, *settings.REPLICA_DATABASES}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+def sticky_key(request):
+    client = request.headers.get("Authorization") or request.META.get("REMOTE_ADDR", "")
+    return f"replicas:sticky:{hashlib.sha256(client.encode()).hexdigest()}"
+
+
+def reads_from_replica(request):
+    if not settings.REPLICA_DATABASES or request.method not in SAFE_METHODS:
+        return False
+    try:
+        module = resolve(request.path_info).func.__module__
+    except Resolver404:
+        return False
+    return module.split(".")[0] in APPS
+
+
+def wrote(request, response):
+    return request.method not in SAFE_METHODS and response.status_code < 400
+
+
+@sync_and_async_middleware
+def replica_middleware(get_response):
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            alias = None
+            if reads_from_replica(request) and not await cache.aget(sticky_key(request)):
+                alias = random.choice(settings.REPLICA_DATABASES)
+            token = _replica.set(alias)
+            try:
+                response = await get_response(request)
+            finally:
+                _replica.reset(token)
+            if settings.REPLICA_DATABASES and wrote(request, response):
+                await cache.aset(sticky_key(request), True, settings.REPLICA_STICKY_SECONDS)
+            return response
+    else:
+        def middleware(request):
+            alias = None
+            if reads_from_replica(request) and not cache.get(sticky_key(request)):
+                alias = random.choice(settings.REPLICA_DATABASES)
+            token = _replica.set(alias)
+            try:
+                response = get_response(request)
+            finally:
+                _replica.reset(token)
+            if settings.REPLICA_DATABASES and wrote(request, response):
+                cache.set(sticky_key(request), True, settings.REPLICA_STICKY_SECONDS)
+            return response
+
+    return middleware
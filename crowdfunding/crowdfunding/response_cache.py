@@ -0,0 +1,181 @@
+"""Shared cache of anonymous GET responses.
+
+Keys carry a global version number; any write to a fundraiser, pledge or
+comment bumps it (see fundraisers.signals), which orphans every cached
+response at once instead of tracking which pages a write touched. If the
+version itself is evicted it restarts from the clock, above any version
+entries could have been stored under. Every worker must share the cache for
+one worker's invalidations to reach the others; check_shared_cache warns
+under `manage.py check --deploy`.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+VERSION_KEY = "responses:version"
+HITS_KEY = "responses:hits"
+MISSES_KEY = "responses:misses"
+PER_PROCESS_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE["ALIAS"]]
+
+
+def fresh_version():
+    # Microseconds: more than the number of bumps since any earlier start.
+    return time.time_ns() // 1000
+
+
+def get_version(cache):
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, fresh_version(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+async def aget_version(cache):
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, fresh_version(), timeout=None)
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+
+def invalidate():
+    # Bump now for readers in this transaction, and again after commit so a
+    # response built from pre-commit data in another worker can't survive.
+    _bump_version()
+    transaction.on_commit(_bump_version)
+
+
+def _bump_version():
+    cache = get_cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, fresh_version(), timeout=None)
+
+
+def _incr(cache, key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+async def _aincr(cache, key):
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        await cache.aadd(key, 1, timeout=None)
+
+
+def make_key(request, version):
+    params = sorted((key, sorted(values)) for key, values in request.GET.lists())
+    # Entries match the ETag conditional_get stamps on them, so a body built
+    # before a clock-dependent change isn't served under the new ETag.
+    raw = f"{request.get_host()}{request.path}?{params}#{getattr(request, 'conditional_etag', '')}"
+    return f"responses:{version}:{hashlib.sha256(raw.encode()).hexdigest()}"
+
+
+def cache_response(method):
+    """Serve an APIView's GET handler from the cache for anonymous clients."""
+
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        timeout = settings.RESPONSE_CACHE["TIMEOUT"]
+        if not timeout or request.user.is_authenticated:
+            return method(self, request, *args, **kwargs)
+
+        cache = get_cache()
+        key = make_key(request, get_version(cache))
+        data = cache.get(key)
+        if data is not None:
+            _incr(cache, HITS_KEY)
+            response = Response(data)
+            response["X-Cache"] = "HIT"
+            return response
+
+        _incr(cache, MISSES_KEY)
+        response = method(self, request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, timeout)
+        response["X-Cache"] = "MISS"
+        return response
+
+    return wrapper
+
+
+def async_cache_response(method):
+    """cache_response for async views, which serve every client the public
+    response; the rendered body is cached so hits skip rendering too."""
+
+    @wraps(method)
+    async def wrapper(self, request, *args, **kwargs):
+        timeout = settings.RESPONSE_CACHE["TIMEOUT"]
+        if not timeout:
+            return await method(self, request, *args, **kwargs)
+
+        cache = get_cache()
+        key = make_key(request, await aget_version(cache))
+        content = await cache.aget(key)
+        if content is not None:
+            await _aincr(cache, HITS_KEY)
+            response = HttpResponse(content, content_type="application/json")
+            response["X-Cache"] = "HIT"
+            return response
+
+        await _aincr(cache, MISSES_KEY)
+        response = await method(self, request, *args, **kwargs)
+        if response.status_code == 200:
+            await cache.aset(key, response.content, timeout)
+        response["X-Cache"] = "MISS"
+        return response
+
+    return wrapper
+
+
+def stats():
+    cache = get_cache()
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total, 4) if total else None,
+        "version": cache.get(VERSION_KEY),
+    }
+
+
+def check_shared_cache(**kwargs):
+    alias = settings.RESPONSE_CACHE["ALIAS"]
+    if not settings.RESPONSE_CACHE["TIMEOUT"] or settings.CACHES[alias]["BACKEND"] not in PER_PROCESS_BACKENDS:
+        return []
+    return [checks.Warning(
+        f"The {alias!r} cache used for responses isn't shared between processes, so writes "
+        "handled by one worker or the scheduler don't invalidate the others' cached responses.",
+        hint="Set DJANGO_CACHE_BACKEND to a shared backend such as DatabaseCache or Redis.",
+        id="crowdfunding.W002",
+    )]
+
+
+class ResponseCacheStats(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(stats())
@@ -0,0 +1,185 @@
+"""Full-text search for the list endpoints.
+
+Each searchable model is registered with the text fields it should match on.
+``search(queryset, text)`` then picks a backend from the database vendor:
+
+* PostgreSQL: ``to_tsvector`` over the fields, served by a GIN expression index.
+* SQLite: an FTS5 table per model, kept in sync by post_save/post_delete.
+* Anything else: the old ``icontains`` filters, unranked.
+
+Matching rows are annotated with ``search_rank`` and ordered best first.
+"""
+import re
+from functools import reduce
+from operator import or_
+
+from django.db import connections, models
+from django.db.migrations.operations.base import Operation
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_save
+
+SEARCH_CONFIG = "english"
+
+_registry = {}
+_fts5_support = {}
+
+
+def register(model, fields):
+    _registry[model] = tuple(fields)
+    post_save.connect(_index_instance, sender=model, dispatch_uid=f"search-save-{model._meta.label}")
+    post_delete.connect(_unindex_instance, sender=model, dispatch_uid=f"search-delete-{model._meta.label}")
+
+
+def search(queryset, text):
+    fields = _registry[queryset.model]
+    connection = connections[queryset.db]
+    terms = re.findall(r"\w+", text)
+
+    if connection.vendor == "postgresql":
+        return _search_postgres(queryset, fields, terms)
+    if connection.vendor == "sqlite" and terms and has_fts5(connection):
+        return _search_sqlite(queryset, terms)
+    return queryset.filter(reduce(or_, (models.Q(**{f"{field}__icontains": text}) for field in fields)))
+
+
+def _search_postgres(queryset, fields, terms):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+    if not terms:
+        return queryset.none()
+    vector = SearchVector(*fields, config=SEARCH_CONFIG)
+    # Same rules as the FTS5 query: every term quoted so it can't be tsquery
+    # syntax, and :* so "show" still finds "showers".
+    raw = " & ".join("'{}':*".format(term) for term in terms)
+    query = SearchQuery(raw, config=SEARCH_CONFIG, search_type="raw")
+    return (
+        queryset.annotate(search_vector=vector, search_rank=SearchRank(vector, query))
+        .filter(search_vector=query)
+        .order_by("-search_rank", "-id")
+    )
+
+
+def _search_sqlite(queryset, terms):
+    table = queryset.model._meta.db_table
+    fts = fts_table(queryset.model)
+    # Quote every term so user input can't use FTS5 query syntax; the trailing *
+    # keeps prefix matches ("bed" finds "beds") close to the old icontains.
+    match = " ".join('"{}"*'.format(term) for term in terms)
+    # FTS5's rank is bm25 where lower is better; flip it so higher is better
+    # like PostgreSQL's ts_rank.
+    return queryset.annotate(
+        search_rank=RawSQL(f'SELECT -rank FROM "{fts}" WHERE "{fts}" MATCH %s AND rowid = "{table}"."id"', [match]),
+    ).filter(
+        pk__in=RawSQL(f'SELECT rowid FROM "{fts}" WHERE "{fts}" MATCH %s', [match]),
+    ).order_by("-search_rank", "-id")
+
+
+def fts_table(model):
+    return f"{model._meta.db_table}_fts"
+
+
+def has_fts5(connection):
+    if connection.alias not in _fts5_support:
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA compile_options")
+            options = {row[0] for row in cursor.fetchall()}
+        _fts5_support[connection.alias] = "ENABLE_FTS5" in options
+    return _fts5_support[connection.alias]
+
+
+def rebuild_index(model, using="default"):
+    """Repopulate a model's FTS5 table, e.g. after bulk_create skipped the signals."""
+    connection = connections[using]
+    if connection.vendor != "sqlite" or not has_fts5(connection):
+        return
+    fields = _registry[model]
+    fts = fts_table(model)
+    columns = ", ".join(f'"{field}"' for field in fields)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM "{fts}"')
+        cursor.execute(
+            f'INSERT INTO "{fts}" (rowid, {columns}) SELECT "id", {columns} FROM "{model._meta.db_table}"'
+        )
+
+
+def _index_instance(sender, instance, using, created, **kwargs):
+    connection = connections[using]
+    if connection.vendor != "sqlite" or not has_fts5(connection):
+        return
+    fields = _registry[sender]
+    values = [getattr(instance, field) for field in fields]
+    if created and not any(values):
+        # Nothing to match on (e.g. a pledge without a comment).
+        return
+    fts = fts_table(sender)
+    columns = ", ".join(f'"{field}"' for field in fields)
+    placeholders = ", ".join(["%s"] * len(fields))
+    with connection.cursor() as cursor:
+        if not created:
+            cursor.execute(f'DELETE FROM "{fts}" WHERE rowid = %s', [instance.pk])
+        if not any(values):
+            return
+        cursor.execute(
+            f'INSERT INTO "{fts}" (rowid, {columns}) VALUES (%s, {placeholders})',
+            [instance.pk, *values],
+        )
+
+
+def _unindex_instance(sender, instance, using, **kwargs):
+    connection = connections[using]
+    if connection.vendor != "sqlite" or not has_fts5(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM "{fts_table(sender)}" WHERE rowid = %s', [instance.pk])
+
+
+class CreateSearchIndex(Operation):
+    """Migration operation that builds the vendor-specific index for a model."""
+
+    reduces_to_sql = False
+    reversible = True
+
+    def __init__(self, model_name, fields):
+        self.model_name = model_name
+        self.fields = list(fields)
+
+    def deconstruct(self):
+        return (self.__class__.__qualname__, [self.model_name, self.fields], {})
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        connection = schema_editor.connection
+        if connection.vendor == "postgresql":
+            schema_editor.add_index(model, self._gin_index())
+        elif connection.vendor == "sqlite" and has_fts5(connection):
+            fts = fts_table(model)
+            columns = ", ".join(f'"{field}"' for field in self.fields)
+            schema_editor.execute(
+                f'CREATE VIRTUAL TABLE "{fts}" USING fts5({columns}, tokenize="porter unicode61")'
+            )
+            schema_editor.execute(
+                f'INSERT INTO "{fts}" (rowid, {columns}) SELECT "id", {columns} FROM "{model._meta.db_table}"'
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        connection = schema_editor.connection
+        if connection.vendor == "postgresql":
+            schema_editor.remove_index(model, self._gin_index())
+        elif connection.vendor == "sqlite" and has_fts5(connection):
+            schema_editor.execute(f'DROP TABLE IF EXISTS "{fts_table(model)}"')
+
+    def _gin_index(self):
+        from django.contrib.postgres.indexes import GinIndex
+        from django.contrib.postgres.search import SearchVector
+
+        return GinIndex(
+            SearchVector(*self.fields, config=SEARCH_CONFIG),
+            name=f"{self.model_name.lower()}_search_idx",
+        )
+
+    def describe(self):
+        return f"Create full-text search index on {self.model_name}"
@@ -56,15 +56,27 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-    'rest_framework.authentication.TokenAuthentication',
-    ]
+    'users.authentication.CachedTokenAuthentication',
+    ],
+    # Proxies in front of the app (Heroku's router is one). Throttles take the
+    # client address this many entries from the end of X-Forwarded-For, so
+    # clients can't pick their own; 0 uses REMOTE_ADDR only.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 1)),
+    # Same output as DRF's JSONRenderer; uses orjson or msgspec if installed.
+    'DEFAULT_RENDERER_CLASSES': [
+        'crowdfunding.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 AUTH_USER_MODEL = 'users.CustomUser'
 
 MIDDLEWARE = [
+    'crowdfunding.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'crowdfunding.replicas.replica_middleware',
+    # WhiteNoise, made async-capable (see crowdfunding.staticfiles).
+    'crowdfunding.staticfiles.StaticFilesMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -105,9 +117,126 @@ DATABASES = {
     }
 }
 
-db_from_env = dj_database_url.config(conn_max_age=500)
+# Connections are reused across requests: with psycopg 3 on PostgreSQL each
+# worker process keeps a pool (DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE
+# connections), otherwise each thread keeps one connection for
+# DB_CONN_MAX_AGE seconds. Either way a connection is checked before reuse,
+# so one dropped by the server is replaced instead of failing a request.
+# Size the pool to the worker's threads (gunicorn --threads) plus one for
+# the events listener; workers x DB_POOL_MAX_SIZE must fit the server's
+# max_connections.
+db_from_env = dj_database_url.config(
+    conn_max_age=int(os.environ.get('DB_CONN_MAX_AGE', 500)),
+    conn_health_checks=True,
+)
 DATABASES['default'].update(db_from_env)
 
+# Read replicas, comma-separated URLs; see crowdfunding.replicas for which
+# reads go to them. In tests they mirror the primary.
+REPLICA_DATABASES = []
+for number, url in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_URLS', '').split(',')), start=1):
+    alias = f'replica{number}'
+    DATABASES[alias] = dj_database_url.parse(
+        url.strip(),
+        conn_max_age=int(os.environ.get('DB_CONN_MAX_AGE', 500)),
+        conn_health_checks=True,
+        test_options={'MIRROR': 'default'},
+    )
+    REPLICA_DATABASES.append(alias)
+
+# Reads by a client that wrote within this many seconds stay on the primary.
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+
+DATABASE_ROUTERS = ['crowdfunding.replicas.ReplicaRouter']
+
+for database in DATABASES.values():
+    if database['ENGINE'] == 'django.db.backends.postgresql' and os.environ.get('DB_POOL', 'True') == 'True':
+        database['CONN_MAX_AGE'] = 0  # The pool keeps the connections instead.
+        database.setdefault('OPTIONS', {})['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 4)),
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', 300)),
+        }
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Local memory (LRU, per process) by default. With several gunicorn workers set
+# DJANGO_CACHE_BACKEND to django.core.cache.backends.db.DatabaseCache (run
+# `manage.py createcachetable`) or filebased.FileBasedCache so workers share
+# entries and invalidations.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', 'crowdfunding'),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('DJANGO_CACHE_MAX_ENTRIES', 1000)),
+        },
+    },
+    # Token buckets for crowdfunding.throttling, kept apart so cached responses
+    # can't cull them. Must be shared by every worker in production (e.g.
+    # DatabaseCache, or Redis); `manage.py check --deploy` warns otherwise.
+    'throttles': {
+        'BACKEND': os.environ.get('THROTTLE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('THROTTLE_CACHE_LOCATION', 'crowdfunding_throttles'),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('THROTTLE_CACHE_MAX_ENTRIES', 100000)),
+        },
+    },
+}
+
+# Cached responses are invalidated through the cache itself, so by default
+# they're only kept when DJANGO_CACHE_BACKEND is shared by every worker and
+# the scheduler; `manage.py check --deploy` warns about a per-process one.
+RESPONSE_CACHE = {
+    'ALIAS': 'default',
+    'TIMEOUT': int(os.environ.get(
+        'RESPONSE_CACHE_TIMEOUT',
+        0 if CACHES['default']['BACKEND'].endswith(('.LocMemCache', '.DummyCache')) else 60,
+    )),
+}
+
+# Per-process LRU of token -> user for users.authentication; TIMEOUT bounds
+# how long a revoked token or deactivated user keeps working in other
+# workers (or after a change made without signals).
+# TIMEOUT 0 disables it.
+TOKEN_AUTH_CACHE = {
+    'MAX_ENTRIES': int(os.environ.get('TOKEN_AUTH_CACHE_MAX_ENTRIES', 10000)),
+    'TIMEOUT': int(os.environ.get('TOKEN_AUTH_CACHE_TIMEOUT', 60)),
+}
+
+# Build list responses from values() rows instead of DRF serializer instances
+# (crowdfunding.row_serializers). Output is identical; off by default.
+FAST_LIST_SERIALIZERS = os.environ.get('FAST_LIST_SERIALIZERS') == 'True'
+
+# Write limits for crowdfunding.throttling, keyed "<view scope>.<kind>":
+# "requests/period", or ("requests/period", burst). Clients over a limit get
+# 429 with Retry-After. Buckets live in CACHES['throttles'].
+THROTTLES = {
+    'ALIAS': 'throttles',
+    'RATES': {} if os.environ.get('THROTTLING') == 'False' else {
+        'pledges.user': ('30/min', 10),
+        'pledges.fundraiser': ('600/min', 100),
+        'comments.user': ('20/min', 10),
+        'comments.fundraiser': ('300/min', 50),
+        'contact.ip': ('5/hour', 3),
+        'signup.ip': ('10/hour', 5),
+    },
+}
+
+# How long a POST's Idempotency-Key can be retried for the same response
+# (fundraisers.idempotency); purge_idempotency_keys deletes older ones.
+IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+
+# Share of requests measured by crowdfunding.metrics (Server-Timing header
+# and /metrics/ histograms); 0 turns it off.
+METRICS_SAMPLE_RATE = float(os.environ.get('METRICS_SAMPLE_RATE', 0.1))
+
+# "postgres" carries fundraiser progress events between processes with
+# LISTEN/NOTIFY (crowdfunding.pubsub); empty keeps them within each process.
+EVENTS_BRIDGE = os.environ.get('EVENTS_BRIDGE', '')
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
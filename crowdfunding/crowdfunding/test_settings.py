@@ -0,0 +1,20 @@
+"""Settings for the test suite; `manage.py test` uses them by default."""
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES, RESPONSE_CACHE
+
+# A second database standing in for a read replica (ReplicaRoutingTests).
+# Unlike the replicas in settings it doesn't mirror the primary, so tests can
+# tell which database served a read.
+_default = DATABASES['default']
+DATABASES['replica'] = {
+    **_default,
+    'TEST': {
+        **_default.get('TEST', {}),
+        'NAME': None if _default['ENGINE'].endswith('sqlite3') else f"test_{_default['NAME']}_replica",
+    },
+}
+if _default['ENGINE'].endswith('sqlite3'):
+    DATABASES['replica']['NAME'] = BASE_DIR / 'replica.sqlite3'  # noqa: F405
+
+# One process, so the in-memory cache is shared by everything under test.
+RESPONSE_CACHE = {**RESPONSE_CACHE, 'TIMEOUT': 60}
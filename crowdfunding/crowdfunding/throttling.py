@@ -0,0 +1,123 @@
+"""Token-bucket throttles for write endpoints.
+
+A view names its throttle_scope ("pledges") and lists the throttles it
+wants; each one looks up settings.THROTTLES["RATES"]["<scope>.<kind>"],
+e.g. "pledges.user" or "pledges.fundraiser". A rate is "requests/period"
+("30/min"), optionally paired with a burst: ("30/min", 10) lets a client
+spend 10 requests at once and then refills one every 2 seconds. Without a
+burst the bucket holds the full "requests".
+
+Buckets are stored as GCRA arrival times (one number per key) in the
+THROTTLES["ALIAS"] cache, which must be shared for limits to hold across
+workers; check_shared_cache warns under `manage.py check --deploy`. Client
+addresses come from X-Forwarded-For as far as REST_FRAMEWORK["NUM_PROXIES"]
+trusts it. The read and write aren't atomic, so concurrent requests can
+overshoot a limit by a few. A rejected request costs one cache read and no
+database work, and DRF answers it with 429 and Retry-After. Reads are never
+throttled, nor requests the view's throttle_exempt(request) accepts.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+from crowdfunding.response_cache import PER_PROCESS_BACKENDS
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def check_shared_cache(**kwargs):
+    alias = settings.THROTTLES["ALIAS"]
+    if not settings.THROTTLES["RATES"] or settings.CACHES[alias]["BACKEND"] not in PER_PROCESS_BACKENDS:
+        return []
+    return [checks.Warning(
+        f"The {alias!r} cache used for throttling isn't shared between processes, "
+        "so each worker enforces its own limits.",
+        hint="Set THROTTLE_CACHE_BACKEND to a shared backend such as DatabaseCache or Redis.",
+        id="crowdfunding.W001",
+    )]
+
+
+def parse_rate(rate):
+    """Return (seconds between requests, burst) for "30/min" or ("30/min", burst)."""
+    rate, burst = rate if isinstance(rate, (tuple, list)) else (rate, None)
+    requests, period = rate.split("/")
+    requests = int(requests)
+    return PERIODS[period[0]] / requests, burst or requests
+
+
+class TokenBucketThrottle(BaseThrottle):
+    kind = None
+
+    def __init__(self):
+        self.retry_after = None
+
+    def get_ident_key(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        scope = getattr(view, "throttle_scope", None)
+        rate = settings.THROTTLES["RATES"].get(f"{scope}.{self.kind}") if scope else None
+        # DRF asks every throttle; once one refuses, the rest don't spend tokens.
+        if rate is None or request.method in SAFE_METHODS or getattr(request, "_throttled", False):
+            return True
+        # e.g. a retry that only replays an earlier response (Idempotency-Key).
+        exempt = getattr(view, "throttle_exempt", None)
+        if exempt is not None and exempt(request):
+            return True
+        ident = self.get_ident_key(request)
+        if ident is None:
+            return True
+
+        interval, burst = parse_rate(rate)
+        cache = caches[settings.THROTTLES["ALIAS"]]
+        key = f"throttle:{scope}.{self.kind}:{ident}"
+        now = time.time()
+        # The bucket is full when the arrival time is in the past; each
+        # request pushes it `interval` further out.
+        arrival = max(cache.get(key, now), now) + interval
+        allowed_from = arrival - burst * interval
+        if allowed_from > now:
+            self.retry_after = allowed_from - now
+            request._throttled = True
+            return False
+        cache.set(key, arrival, timeout=math.ceil(arrival - now))
+        return True
+
+    def wait(self):
+        return self.retry_after
+
+
+class UserThrottle(TokenBucketThrottle):
+    """Per user, or per client address before logging in."""
+
+    kind = "user"
+
+    def get_ident_key(self, request):
+        if request.user.is_authenticated:
+            return f"user-{request.user.pk}"
+        return f"ip-{self.get_ident(request)}"
+
+
+class IPThrottle(TokenBucketThrottle):
+    kind = "ip"
+
+    def get_ident_key(self, request):
+        return self.get_ident(request)
+
+
+class FundraiserThrottle(TokenBucketThrottle):
+    """Per target fundraiser, across all clients, so one hot fundraiser can't
+    monopolise the database."""
+
+    kind = "fundraiser"
+
+    def get_ident_key(self, request):
+        try:
+            return int(request.data.get("fundraiser"))
+        except (AttributeError, TypeError, ValueError):
+            return None  # Left for the serializer to reject.
@@ -16,8 +16,10 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from users.views import CustomAuthToken
+from users.views import CustomAuthToken, TokenCacheStats
 from django.http import JsonResponse
+from crowdfunding.metrics import Metrics
+from crowdfunding.response_cache import ResponseCacheStats
 
 def home(request):
     return JsonResponse({"status": "ok"})
@@ -28,6 +30,9 @@ urlpatterns = [
     path("", include("fundraisers.urls")),
     path("", include("users.urls")),
     path("api-token-auth/", CustomAuthToken.as_view(), name="api_token_auth"),
+    path("cache-stats/", ResponseCacheStats.as_view(), name="cache_stats"),
+    path("auth-cache-stats/", TokenCacheStats.as_view(), name="auth_cache_stats"),
+    path("metrics/", Metrics.as_view(), name="metrics"),
 ]
 
 handler404 = "fundraisers.views.custom_404"
\ No newline at end of file
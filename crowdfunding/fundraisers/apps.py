@@ -4,3 +4,16 @@ from django.apps import AppConfig
 class FundraisersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'fundraisers'
+
+    def ready(self):
+        from django.core import checks
+
+        from crowdfunding import response_cache, search, throttling
+        from . import signals  # noqa: F401
+        from .models import Comment, Fundraiser, Pledge
+
+        search.register(Fundraiser, ["title", "description"])
+        search.register(Pledge, ["comment"])
+        search.register(Comment, ["content"])
+        checks.register(response_cache.check_shared_cache, checks.Tags.caches, deploy=True)
+        checks.register(throttling.check_shared_cache, checks.Tags.caches, deploy=True)
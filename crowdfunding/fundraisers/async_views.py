@@ -0,0 +1,173 @@
+"""Async versions of the public read endpoints, mounted under /async/.
+
+Served by an ASGI worker (see the Procfile), a request waiting on the
+database or a slow client holds a coroutine instead of a whole worker. Every
+middleware is async-capable, so only the sync hooks of Django's own
+middleware step briefly into a thread. The
+response bodies match the sync views. These views never authenticate, so
+every client gets the public response, cached like an anonymous one.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from crowdfunding import pubsub
+from crowdfunding.conditional import async_conditional_get
+from crowdfunding.pagination import KeysetPagination
+from crowdfunding.response_cache import async_cache_response
+from . import events
+from .filters import filter_comments, filter_fundraisers, parse_tree_window
+from .models import Comment, Fundraiser
+from .serializers import CommentSerializer, FundraiserDetailSerializer
+from .views import FUNDRAISER_ROWS, afundraiser_validators
+
+
+def render(data, status=200):
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    return HttpResponse(renderer.render(data), content_type=renderer.media_type, status=status)
+
+
+async def apply_filters(filter_queryset, queryset, params):
+    if params.get("search"):
+        # The first search on SQLite checks for FTS5 with a sync query.
+        return await sync_to_async(filter_queryset)(queryset, params)
+    return filter_queryset(queryset, params)
+
+
+class AsyncFundraiserList(View):
+    @async_cache_response
+    async def get(self, request):
+        try:
+            fundraisers = await apply_filters(filter_fundraisers, Fundraiser.objects.all(), request.GET)
+        except ValueError:
+            return render({"detail": "Invalid filter value."}, status=400)
+
+        rows = FUNDRAISER_ROWS.values(fundraisers)
+        paginator = KeysetPagination()
+        request = Request(request)
+        if paginator.is_requested(request):
+            try:
+                page = await paginator.apaginate_queryset(rows, request)
+            except NotFound as exc:
+                return render({"detail": exc.detail}, status=404)
+            return render(paginator.get_paginated_response(FUNDRAISER_ROWS.serialize(page)).data)
+        return render(FUNDRAISER_ROWS.serialize([row async for row in rows]))
+
+
+class AsyncFundraiserDetail(View):
+    async def get_validators(self, request, pk):
+        return await afundraiser_validators(pk, request)
+
+    @async_conditional_get
+    @async_cache_response
+    async def get(self, request, pk):
+        try:
+            fundraiser = await Fundraiser.objects.for_detail().aget(pk=pk)
+        except Fundraiser.DoesNotExist:
+            return render({"detail": "Not found."}, status=404)
+        # Owner and pledges are already loaded, so serializing doesn't query.
+        return render(FundraiserDetailSerializer(fundraiser, context={"request": request}).data)
+
+
+class AsyncFundraiserEvents(View):
+    """Server-sent events carrying a fundraiser's progress.
+
+    The first event is the current state; later ones arrive as pledges are
+    committed, instead of clients polling the detail endpoint. The stream
+    ends after the event that reports the fundraiser closed.
+    """
+
+    heartbeat = 15
+    retry = 5000
+
+    async def get(self, request, pk):
+        if not isinstance(request, ASGIRequest):
+            # WSGI reads an async stream to the end before sending any of it,
+            # holding a sync worker until the fundraiser closes.
+            return render({"detail": "Progress events need an ASGI server (SERVER_INTERFACE=asgi)."}, status=501)
+        # Subscribe before reading the snapshot so no change falls in between.
+        subscription = pubsub.subscribe(events.channel(pk))
+        snapshot = await events.asnapshot(pk)
+        if snapshot is None:
+            subscription.close()
+            return render({"detail": "Not found."}, status=404)
+
+        response = StreamingHttpResponse(self.stream(subscription, snapshot), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    async def stream(self, subscription, event):
+        renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+        try:
+            yield f"retry: {self.retry}\n\n"
+            version = event["version"]
+            yield self.format(renderer, event)
+            while event["is_open"]:
+                try:
+                    event = await subscription.get(timeout=self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event["version"] <= version:
+                    continue  # Older than what this client already has.
+                version = event["version"]
+                yield self.format(renderer, event)
+        finally:
+            subscription.close()
+
+    def format(self, renderer, event):
+        return f"id: {event['version']}\nevent: progress\ndata: {renderer.render(event).decode()}\n\n"
+
+
+class AsyncCommentList(View):
+    async def get_validators(self, request):
+        try:
+            fundraiser_id = int(request.GET.get("fundraiser") or "")
+        except ValueError:
+            return None  # No ETag; get() answers 400 for a malformed id.
+        return await afundraiser_validators(fundraiser_id, request)
+
+    @async_conditional_get
+    @async_cache_response
+    async def get(self, request):
+        params = request.GET
+        tree = params.get("tree")
+        try:
+            if params.get("fundraiser") and tree and tree.lower() == "true":
+                return await self.get_tree(request, int(params["fundraiser"]))
+            comments = await apply_filters(filter_comments, Comment.objects.select_related("author"), params)
+        except ValueError:
+            return render({"detail": "Invalid filter value."}, status=400)
+
+        paginator = KeysetPagination()
+        request = Request(request)
+        if paginator.is_requested(request):
+            try:
+                comments = await paginator.apaginate_queryset(comments, request)
+            except NotFound as exc:
+                return render({"detail": exc.detail}, status=404)
+        else:
+            comments = [comment async for comment in comments]
+        # Outside tree mode each comment's replies are a query of their own.
+        data = await sync_to_async(lambda: CommentSerializer(comments, many=True).data)()
+        if paginator.is_requested(request):
+            return render(paginator.get_paginated_response(data).data)
+        return render(data)
+
+    async def get_tree(self, request, fundraiser_id):
+        offset, limit, max_depth = parse_tree_window(request.GET)  # ValueError: get() answers 400.
+        roots, children = await Comment.aload_tree(fundraiser_id)
+        roots = roots[offset:offset + limit] if limit else roots[offset:]
+
+        context = {
+            "children": children,
+            "max_depth": max_depth,
+        }
+        return render(CommentSerializer(roots, many=True, context=context).data)
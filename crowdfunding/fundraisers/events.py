@@ -0,0 +1,48 @@
+"""Fundraiser progress events for the server-sent events stream.
+
+Each committed change to a fundraiser's totals or open status publishes one
+progress snapshot. Open streams receive it without querying the database.
+"""
+from functools import partial
+
+from django.db import transaction
+
+from crowdfunding import pubsub
+from .models import Fundraiser
+from .serializers import FundraiserRowSerializer
+
+FIELDS = ("id", "goal", "total_pledged", "pledge_count", "is_open", "deadline", "version")
+
+_progress = FundraiserRowSerializer().get_progress
+
+
+def channel(fundraiser_id):
+    return f"fundraiser:{fundraiser_id}"
+
+
+def to_event(row):
+    if row is None:
+        return None
+    return {**row, "progress": _progress(row)}
+
+
+def snapshot(fundraiser_id):
+    return to_event(Fundraiser.objects.filter(pk=fundraiser_id).values(*FIELDS).first())
+
+
+async def asnapshot(fundraiser_id):
+    return to_event(await Fundraiser.objects.filter(pk=fundraiser_id).values(*FIELDS).afirst())
+
+
+def publish_progress(fundraiser_id):
+    if not pubsub.bridged() and not pubsub.broker.subscriber_count(channel(fundraiser_id)):
+        return  # Nobody in this process is listening; skip the query.
+    event = snapshot(fundraiser_id)
+    if event is not None:
+        pubsub.publish(channel(fundraiser_id), event)
+
+
+def publish_on_commit(fundraiser_ids, using="default"):
+    # After commit, so streams never show totals that get rolled back.
+    for fundraiser_id in fundraiser_ids:
+        transaction.on_commit(partial(publish_progress, fundraiser_id), using=using)
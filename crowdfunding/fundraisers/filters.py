@@ -0,0 +1,133 @@
+"""Query-parameter filters shared by the list views, exports and commands.
+
+``params`` is anything with ``.get()``: request.query_params or a plain dict.
+Malformed values raise ValueError.
+"""
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from crowdfunding.search import search as full_text_search
+
+# Most top-level comments one tree-mode request can ask for with ``limit``.
+MAX_TREE_ROOTS = 100
+
+
+def parse_bound(value, end=False):
+    """Accept a date or datetime query parameter; bare end dates cover the whole day."""
+    if value is None:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        parsed = datetime.combine(day, time.max if end else time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def parse_count(value, minimum=0, maximum=None):
+    """Accept a whole-number query parameter, clamped to [minimum, maximum]."""
+    if value is None or value == "":
+        return None
+    count = max(int(value), minimum)
+    return count if maximum is None else min(count, maximum)
+
+
+def parse_tree_window(params):
+    """(offset, limit, max_depth) for comment tree mode; limit and max_depth may be None."""
+    return (
+        parse_count(params.get("offset")) or 0,
+        parse_count(params.get("limit"), minimum=1, maximum=MAX_TREE_ROOTS),
+        parse_count(params.get("depth"), minimum=1),
+    )
+
+
+def filter_created(queryset, params):
+    date_from = parse_bound(params.get("date_from") or None)
+    if date_from:
+        queryset = queryset.filter(date_created__gte=date_from)
+
+    date_to = parse_bound(params.get("date_to") or None, end=True)
+    if date_to:
+        queryset = queryset.filter(date_created__lte=date_to)
+    return queryset
+
+
+def filter_fundraisers(fundraisers, params):
+    is_open = params.get("is_open")
+    if is_open is not None:
+        fundraisers = fundraisers.filter(is_open=(is_open.lower() == "true"))
+
+    goal_lte = params.get("goal_lte")
+    if goal_lte:
+        fundraisers = fundraisers.filter(goal__lte=int(goal_lte))
+
+    goal_gte = params.get("goal_gte")
+    if goal_gte:
+        fundraisers = fundraisers.filter(goal__gte=int(goal_gte))
+
+    owner = params.get("owner")
+    if owner:
+        fundraisers = fundraisers.filter(owner__id=int(owner))
+
+    has_deadline = params.get("has_deadline")
+    if has_deadline is not None:
+        if has_deadline.lower() == "true":
+            fundraisers = fundraisers.exclude(deadline=None)
+        else:
+            fundraisers = fundraisers.filter(deadline=None)
+
+    fundraisers = filter_created(fundraisers, params)
+
+    search = params.get("search")
+    if search:
+        fundraisers = full_text_search(fundraisers, search)
+    return fundraisers
+
+
+def filter_pledges(pledges, params):
+    fundraiser_id = params.get("fundraiser")
+    if fundraiser_id:
+        pledges = pledges.filter(fundraiser__id=int(fundraiser_id))
+
+    supporter_id = params.get("supporter")
+    if supporter_id:
+        pledges = pledges.filter(supporter__id=int(supporter_id))
+
+    anonymous = params.get("anonymous")
+    if anonymous is not None:
+        pledges = pledges.filter(anonymous=(anonymous.lower() == "true"))
+
+    amount_lte = params.get("amount_lte")
+    if amount_lte:
+        pledges = pledges.filter(amount__lte=int(amount_lte))
+
+    pledges = filter_created(pledges, params)
+
+    search = params.get("search")
+    if search:
+        pledges = full_text_search(pledges, search)
+    return pledges
+
+
+def filter_comments(comments, params):
+    fundraiser_id = params.get("fundraiser")
+    if fundraiser_id:
+        comments = comments.filter(fundraiser_id=int(fundraiser_id))
+
+    author_id = params.get("author")
+    if author_id:
+        comments = comments.filter(author__id=int(author_id))
+
+    anonymous = params.get("anonymous")
+    if anonymous is not None:
+        comments = comments.filter(anonymous=(anonymous.lower() == "true"))
+
+    search = params.get("search")
+    if search:
+        comments = full_text_search(comments, search)
+    return comments
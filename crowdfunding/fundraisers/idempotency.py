@@ -0,0 +1,111 @@
+"""Idempotency-Key support for POST handlers.
+
+A client that sends the same Idempotency-Key again (say, after a timeout)
+gets the first request's response back instead of a second pledge. A
+retry costs one lookup on the unique (user, path, key) index; the handler,
+its validation and the totals/close work don't run again.
+
+Successful responses are stored in the same transaction as the handler's
+writes, so a key is only taken if its pledge or fundraiser was committed.
+When two identical requests race, the loser's insert hits the unique
+constraint, its writes roll back, and it replays the winner's response.
+Error responses aren't stored, so a corrected retry can still succeed.
+Keys expire after settings.IDEMPOTENCY_KEY_TTL seconds; purge_idempotency_keys
+deletes expired rows. Replays skip the write throttles too, so a retry after
+a timeout gets its original response rather than 429.
+"""
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+def request_hash(request):
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def find(request, key, now):
+    stored = IdempotencyKey.objects.filter(user=request.user, path=request.path, key=key).first()
+    if stored is not None and stored.expires_at <= now:
+        stored.delete()
+        return None
+    return stored
+
+
+def stored_response(request):
+    """The stored row a retry of this request would replay, or None.
+
+    Looked up once per request, so the throttles (see PledgeList) can let a
+    replay through without a second query.
+    """
+    if not hasattr(request, "_idempotency_stored"):
+        key = request.headers.get(HEADER)
+        valid = key and len(key) <= MAX_KEY_LENGTH and request.user.is_authenticated
+        request._idempotency_stored = find(request, key, timezone.now()) if valid else None
+    return request._idempotency_stored
+
+
+def replay(request, stored):
+    if stored.request_hash != request_hash(request):
+        return Response(
+            {"detail": f"This {HEADER} was already used for a different request."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    response = Response(stored.response, status=stored.status_code)
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def idempotent(method):
+    """Store and replay an APIView POST handler's response per Idempotency-Key."""
+
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key or not request.user.is_authenticated:
+            return method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"detail": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        now = timezone.now()
+        stored = stored_response(request)
+        if stored is not None:
+            return replay(request, stored)
+
+        try:
+            with transaction.atomic():
+                response = method(self, request, *args, **kwargs)
+                if status.is_success(response.status_code):
+                    IdempotencyKey.objects.create(
+                        user=request.user,
+                        path=request.path,
+                        key=key,
+                        request_hash=request_hash(request),
+                        status_code=response.status_code,
+                        response=response.data,
+                        expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+                    )
+        except IntegrityError:
+            # A concurrent request with this key committed first.
+            stored = find(request, key, now)
+            if stored is None:
+                raise
+            return replay(request, stored)
+        return response
+
+    return wrapper
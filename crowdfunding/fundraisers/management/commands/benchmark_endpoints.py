@@ -0,0 +1,249 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+import uuid
+from datetime import datetime, timezone as dt_timezone
+from importlib import import_module
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, F
+from django.test import Client, override_settings
+from django.urls import URLPattern
+from rest_framework.authtoken.models import Token
+
+from fundraisers.models import Comment, Fundraiser, Pledge
+from fundraisers.rankings import RANKINGS
+
+# Routes the harness leaves out, and why.
+SKIPPED = {
+    "async/fundraisers/<int:pk>/events/": "a server-sent events stream stays open until the fundraiser closes",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Time every endpoint in fundraisers/urls.py and users/urls.py against the current database "
+        "(see seed_data) and report latency percentiles and query counts, optionally saved as JSON "
+        "and compared with an earlier run. Writes are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=20, help="Timed requests per endpoint.")
+        parser.add_argument("--warmup", type=int, default=2, help="Untimed requests per endpoint first.")
+        parser.add_argument("--output", help="Write the results to this JSON file.")
+        parser.add_argument("--compare", help="A JSON file from an earlier run to compare against.")
+        parser.add_argument("--threshold", type=float, default=0.2, help="Slowdown that counts as a regression.")
+        parser.add_argument("--response-cache", action="store_true", help="Leave the response cache on.")
+
+    def handle(self, *args, **options):
+        if not Fundraiser.objects.exists() or not Pledge.objects.exists() or not Comment.objects.exists():
+            raise CommandError("No data to benchmark; run seed_data first.")
+        if not Fundraiser.objects.filter(is_open=True).exists():
+            raise CommandError("Every fundraiser is closed, so POST /pledges/ can't be timed; run seed_data again.")
+        if options["requests"] < 1:
+            raise CommandError("--requests must be at least 1.")
+
+        cache_timeout = settings.RESPONSE_CACHE["TIMEOUT"] if options["response_cache"] else 0
+        with override_settings(
+            RESPONSE_CACHE={**settings.RESPONSE_CACHE, "TIMEOUT": cache_timeout},
+            METRICS_SAMPLE_RATE=0,
+            THROTTLES={**settings.THROTTLES, "RATES": {}},
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+        ), transaction.atomic():
+            meta = self.meta(options)
+            cases = self.cases()
+            results = {}
+            for name, send in cases:
+                results[name] = self.measure(send, options["requests"], options["warmup"])
+                self.report(name, results[name])
+            transaction.set_rollback(True)
+
+        covered = {name.split(" ", 2)[1] for name, _ in cases}
+        for route in self.routes():
+            if route in SKIPPED:
+                self.stdout.write(f"Skipped {route}: {SKIPPED[route]}.")
+            elif route not in covered:
+                self.stderr.write(f"No benchmark for {route}.")
+
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump({"meta": meta, "results": results}, output, indent=2)
+                output.write("\n")
+            self.stdout.write(f"Saved to {options['output']}.")
+        if options["compare"]:
+            self.compare(options["compare"], results, options["threshold"])
+
+    def routes(self):
+        routes = []
+        for urls in ("fundraisers.urls", "users.urls"):
+            for pattern in import_module(urls).urlpatterns:
+                if isinstance(pattern, URLPattern) and str(pattern.pattern) not in routes:
+                    routes.append(str(pattern.pattern))
+        return routes
+
+    def cases(self):
+        """(name, send) pairs; a name is "METHOD route variant" and send() returns a response."""
+        User = get_user_model()
+        fundraiser = Fundraiser.objects.order_by("-pledge_count", "id").first()
+        open_fundraiser = Fundraiser.objects.filter(is_open=True).order_by(F("total_pledged") - F("goal"), "id").first()
+        pledge = Pledge.objects.filter(fundraiser=fundraiser).order_by("id").first()
+        comment = Comment.objects.filter(parent=None).annotate(replies_count=Count("replies")).order_by("-replies_count", "id").first()
+        owner = fundraiser.owner
+
+        supporter = User.objects.create_user(username=f"benchmark-{uuid.uuid4().hex[:12]}")
+        admin = User.objects.create_superuser(username=f"benchmark-admin-{uuid.uuid4().hex[:12]}")
+        anonymous = Client()
+        member = Client(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=supporter).key}")
+        staff = Client(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=admin).key}")
+
+        def get(client, path, params=None):
+            return lambda: client.get(path, params)
+
+        def post(client, path, data):
+            return lambda: client.post(path, data() if callable(data) else data, content_type="application/json")
+
+        def upload():
+            body = f"title,description,goal,image,owner\nImported,Benchmark row,100,https://example.com/i.png,{owner.pk}\n"
+            return staff.post("/imports/fundraisers/", {"file": SimpleUploadedFile("rows.csv", body.encode())})
+
+        cases = [
+            ("GET fundraisers/ all", get(anonymous, "/fundraisers/")),
+            ("GET fundraisers/ page", get(anonymous, "/fundraisers/", {"page_size": 20})),
+            ("GET fundraisers/ search", get(anonymous, "/fundraisers/", {"search": "winter"})),
+            ("GET fundraisers/<int:pk>/", get(anonymous, f"/fundraisers/{fundraiser.pk}/")),
+            ("GET fundraisers/<int:pk>/analytics/", get(anonymous, f"/fundraisers/{fundraiser.pk}/analytics/")),
+        ]
+        cases += [
+            (f"GET fundraisers/rankings/<slug:kind>/ {kind}", get(anonymous, f"/fundraisers/rankings/{kind}/"))
+            for kind in RANKINGS
+        ]
+        cases += [
+            ("GET exports/<slug:kind>/ fundraisers", get(staff, "/exports/fundraisers/")),
+            ("GET exports/<slug:kind>/ pledges", get(staff, "/exports/pledges/", {"fundraiser": fundraiser.pk})),
+            ("POST imports/<slug:kind>/ fundraisers", upload),
+            ("GET pledges/ all", get(anonymous, "/pledges/")),
+            ("GET pledges/ page", get(anonymous, "/pledges/", {"page_size": 20})),
+            ("GET pledges/<int:pk>/", get(anonymous, f"/pledges/{pledge.pk}/")),
+            ("GET comments/ tree", get(anonymous, "/comments/", {"fundraiser": fundraiser.pk, "tree": "true"})),
+            ("GET comments/ page", get(anonymous, "/comments/", {"page_size": 20})),
+            ("GET comments/<int:pk>/", get(anonymous, f"/comments/{comment.pk}/")),
+            ("GET async/fundraisers/ page", get(anonymous, "/async/fundraisers/", {"page_size": 20})),
+            ("GET async/fundraisers/<int:pk>/", get(anonymous, f"/async/fundraisers/{fundraiser.pk}/")),
+            ("GET async/comments/ tree", get(anonymous, "/async/comments/", {"fundraiser": fundraiser.pk, "tree": "true"})),
+            ("GET users/ page", get(anonymous, "/users/", {"page_size": 20})),
+            ("GET users/<int:pk>/", get(anonymous, f"/users/{owner.pk}/")),
+            ("POST fundraisers/", post(member, "/fundraisers/", {
+                "title": "Benchmark", "description": "Created by benchmark_endpoints", "goal": 100,
+                "image": "https://example.com/image.png",
+            })),
+            ("POST pledges/", post(member, "/pledges/", {"amount": 1, "fundraiser": open_fundraiser.pk})),
+            ("POST comments/", post(member, "/comments/", {"fundraiser": fundraiser.pk, "content": "Benchmark"})),
+            ("POST contact/", post(anonymous, "/contact/", {
+                "name": "Benchmark", "email": "benchmark@example.com", "subject": "Timing", "message": "Hello",
+            })),
+            ("POST users/", post(anonymous, "/users/", lambda: {
+                "username": f"benchmark-{uuid.uuid4().hex[:12]}", "email": "benchmark@example.com", "password": "benchmark-password",
+            })),
+        ]
+        return cases
+
+    def measure(self, send, count, warmup):
+        queries = 0
+
+        def count_query(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        for _ in range(warmup):
+            self.send(send)
+        latencies, query_counts = [], []
+        with connection.execute_wrapper(count_query):
+            for _ in range(count):
+                queries = 0
+                started = time.perf_counter()
+                status = self.send(send)
+                latencies.append((time.perf_counter() - started) * 1000)
+                query_counts.append(queries)
+        latencies.sort()
+        return {
+            "status": status,
+            "queries": max(query_counts),
+            "mean_ms": round(statistics.fmean(latencies), 3),
+            "p50_ms": round(self.percentile(latencies, 0.5), 3),
+            "p90_ms": round(self.percentile(latencies, 0.9), 3),
+            "p99_ms": round(self.percentile(latencies, 0.99), 3),
+            "max_ms": round(latencies[-1], 3),
+        }
+
+    def send(self, send):
+        response = send()
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        return response.status_code
+
+    def percentile(self, ordered, share):
+        # Nearest rank.
+        return ordered[max(0, min(len(ordered) - 1, round(share * len(ordered)) - 1))]
+
+    def report(self, name, result):
+        if not hasattr(self, "_header"):
+            self._header = True
+            self.stdout.write(f"{'endpoint':<56} {'status':>6} {'queries':>7} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}")
+        self.stdout.write(
+            f"{name[:56]:<56} {result['status']:>6} {result['queries']:>7} "
+            f"{result['p50_ms']:>8.2f} {result['p90_ms']:>8.2f} {result['p99_ms']:>8.2f}"
+        )
+
+    def meta(self, options):
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "HEAD"], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            "commit": commit,
+            "date": datetime.now(dt_timezone.utc).isoformat(timespec="seconds"),
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "requests": options["requests"],
+            "warmup": options["warmup"],
+            "response_cache": options["response_cache"],
+            "rows": {
+                "users": get_user_model().objects.count(),
+                "fundraisers": Fundraiser.objects.count(),
+                "pledges": Pledge.objects.count(),
+                "comments": Comment.objects.count(),
+            },
+        }
+
+    def compare(self, path, results, threshold):
+        with open(path) as baseline_file:
+            baseline = json.load(baseline_file)
+        self.stdout.write(f"\nAgainst {path} ({baseline['meta'].get('commit') or 'unknown commit'}):")
+        self.stdout.write(f"{'endpoint':<56} {'p50 ms':>15} {'change':>8} {'queries':>9}")
+        regressions = 0
+        for name, result in results.items():
+            before = baseline["results"].get(name)
+            if before is None:
+                self.stdout.write(f"{name[:56]:<56} {'new':>15}")
+                continue
+            change = result["p50_ms"] / before["p50_ms"] - 1 if before["p50_ms"] else 0
+            slower = change > threshold or result["queries"] > before["queries"]
+            regressions += slower
+            line = (
+                f"{name[:56]:<56} {before['p50_ms']:>6.2f} → {result['p50_ms']:>6.2f} {change:>+8.0%} "
+                f"{before['queries']:>3} → {result['queries']:<3}"
+            )
+            self.stdout.write(self.style.ERROR(line) if slower else line)
+        self.stdout.write(f"{regressions} regression(s) at a {threshold:.0%} threshold.")
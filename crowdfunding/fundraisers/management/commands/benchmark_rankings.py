@@ -0,0 +1,112 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce, TruncHour
+from django.utils import timezone
+
+from fundraisers import rankings
+from fundraisers.models import Fundraiser, HourlyPledgeStat, Pledge
+
+
+class Command(BaseCommand):
+    help = "Compare the precomputed rankings with ranking by aggregating pledges. Everything is rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fundraisers", type=int, default=2_000)
+        parser.add_argument("--pledges", type=int, default=200_000)
+        parser.add_argument("--limit", type=int, default=10)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        limit = options["limit"]
+        with transaction.atomic():
+            self.seed(options["fundraisers"], options["pledges"])
+            since = timezone.now() - timedelta(hours=24)
+            totals = Fundraiser.objects.annotate(pledged=Coalesce(Sum("pledges__amount"), 0))
+
+            cases = [
+                (
+                    "most-funded",
+                    lambda: list(totals.order_by("-pledged", "id")[:limit]),
+                    lambda: rankings.most_funded(limit),
+                ),
+                (
+                    "closest-to-goal",
+                    lambda: list(totals.filter(is_open=True).order_by(F("goal") - F("pledged"), "id")[:limit]),
+                    lambda: rankings.closest_to_goal(limit),
+                ),
+                (
+                    "trending",
+                    lambda: list(
+                        Pledge.objects.filter(date_created__gte=since, fundraiser__is_open=True)
+                        .values("fundraiser")
+                        .annotate(recent=Sum("amount"))
+                        .order_by("-recent")[:limit]
+                    ),
+                    lambda: rankings.trending(limit, hours=24),
+                ),
+            ]
+
+            self.stdout.write(f"{'ranking':<16} {'aggregate ms':>13} {'precomputed ms':>15}")
+            for name, naive, precomputed in cases:
+                self.stdout.write(
+                    f"{name:<16} {self.time(naive, options['repeat']):>13.2f} "
+                    f"{self.time(precomputed, options['repeat']):>15.2f}"
+                )
+            transaction.set_rollback(True)
+
+    def seed(self, fundraiser_count, pledge_count):
+        rng = random.Random(1)
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(username=f"benchmark-rankings-{i}") for i in range(50)
+        )
+        fundraisers = Fundraiser.objects.bulk_create(
+            Fundraiser(
+                title=f"Fundraiser {i}",
+                description="Benchmark",
+                goal=rng.randint(1_000, 1_000_000),
+                image="https://example.com/image.png",
+                owner=rng.choice(users),
+            )
+            for i in range(fundraiser_count)
+        )
+
+        now = timezone.now()
+        date_created = Pledge._meta.get_field("date_created")
+        date_created.auto_now_add = False
+        try:
+            for start in range(0, pledge_count, 10_000):
+                Pledge.objects.bulk_create(
+                    Pledge(
+                        amount=rng.randint(1, 100),
+                        # Skewed so a few fundraisers get most of the pledges.
+                        fundraiser=fundraisers[min(int(rng.paretovariate(1.2)) - 1, fundraiser_count - 1)],
+                        supporter=rng.choice(users),
+                        date_created=now - timedelta(minutes=rng.randint(0, 60 * 24 * 14)),
+                    )
+                    for _ in range(start, min(start + 10_000, pledge_count))
+                )
+        finally:
+            date_created.auto_now_add = True
+
+        Fundraiser.rebuild_totals(Fundraiser.objects.filter(pk__in=[f.pk for f in fundraisers]))
+        HourlyPledgeStat.objects.bulk_create(
+            HourlyPledgeStat(**row)
+            for row in Pledge.objects.annotate(hour=TruncHour("date_created"))
+            .values("fundraiser_id", "hour")
+            .annotate(amount=Sum("amount"), pledge_count=Count("id"))
+            .order_by()
+        )
+
+    def time(self, query, repeat):
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            query()
+            best = min(best, time.perf_counter() - started)
+        return best * 1000
@@ -0,0 +1,87 @@
+import random
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from crowdfunding import renderers
+from fundraisers.models import Fundraiser, Pledge
+from fundraisers.serializers import FundraiserSerializer, PledgeSerializer
+
+
+class Command(BaseCommand):
+    help = "Compare JSON render time and allocations for DRF's renderer and the fast backends. Everything is rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fundraisers", type=int, default=5_000)
+        parser.add_argument("--pledges", type=int, default=20_000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options["fundraisers"], options["pledges"])
+            payloads = [
+                ("fundraisers", FundraiserSerializer(Fundraiser.objects.for_list(), many=True).data),
+                ("pledges", PledgeSerializer(Pledge.objects.select_related("supporter"), many=True).data),
+            ]
+            transaction.set_rollback(True)
+
+        candidates = [("drf", JSONRenderer())]
+        for backend in renderers.available_backends():
+            renderer = renderers.FastJSONRenderer()
+            renderer.backend, renderer.dumps = backend, renderers.available_backends()[backend]
+            candidates.append((backend, renderer))
+        if len(candidates) == 1:
+            self.stdout.write("Neither orjson nor msgspec is installed; only DRF's renderer is timed.")
+
+        self.stdout.write(f"{'payload':<12} {'renderer':<9} {'ms':>8} {'peak KiB':>9} {'MB':>6} {'speedup':>8}")
+        for name, data in payloads:
+            baseline = None
+            for label, renderer in candidates:
+                seconds = self.time(renderer, data, options["repeat"])
+                peak = self.peak(renderer, data)
+                size = len(renderer.render(data))
+                baseline = baseline or seconds
+                self.stdout.write(
+                    f"{name:<12} {label:<9} {seconds * 1000:>8.2f} {peak / 1024:>9.0f} {size / 1e6:>6.2f} "
+                    f"{baseline / seconds:>7.1f}x"
+                )
+
+    def seed(self, fundraiser_count, pledge_count):
+        rng = random.Random(1)
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(username=f"benchmark-renderers-{i}") for i in range(50)
+        )
+        fundraisers = Fundraiser.objects.bulk_create(
+            Fundraiser(
+                title=f"Fundraiser {i}",
+                description="Beds, meals and blankets for the winter — ñ",
+                goal=rng.randint(1_000, 100_000),
+                image="https://example.com/image.png",
+                owner=rng.choice(users),
+            )
+            for i in range(fundraiser_count)
+        )
+        Pledge.objects.bulk_create(
+            Pledge(amount=rng.randint(1, 100), fundraiser=rng.choice(fundraisers), supporter=rng.choice(users))
+            for _ in range(pledge_count)
+        )
+
+    def time(self, renderer, data, repeat):
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            renderer.render(data)
+            best = min(best, time.perf_counter() - started)
+        return best
+
+    def peak(self, renderer, data):
+        tracemalloc.start()
+        try:
+            renderer.render(data)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
@@ -0,0 +1,67 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from crowdfunding import search
+from fundraisers.models import Fundraiser
+
+WORDS = (
+    "shelter beds winter meals blankets showers clothing housing rent support community "
+    "families youth outreach kitchen laundry transport medical dental counselling storage"
+).split()
+
+
+class Command(BaseCommand):
+    help = "Time full-text search against icontains on synthetic fundraisers. Everything is rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", type=int, default=[10_000, 100_000, 1_000_000])
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        rng = random.Random(1)
+        self.stdout.write(f"{'rows':>10} {'matches':>8} {'icontains ms':>13} {'full-text ms':>13}")
+
+        for size in options["sizes"]:
+            with transaction.atomic():
+                owner = get_user_model().objects.create_user(username="benchmark-search-owner")
+                for start in range(0, size, options["batch_size"]):
+                    batch = []
+                    for i in range(start, min(start + options["batch_size"], size)):
+                        description = " ".join(rng.choices(WORDS, k=20))
+                        if i % 1000 == 0:
+                            # A rare term, so both strategies return the same handful of rows.
+                            description += " lighthouse"
+                        batch.append(Fundraiser(
+                            title=" ".join(rng.choices(WORDS, k=3)),
+                            description=description,
+                            goal=1000,
+                            image="https://example.com/image.png",
+                            owner=owner,
+                        ))
+                    Fundraiser.objects.bulk_create(batch)
+                search.rebuild_index(Fundraiser)
+
+                fundraisers = Fundraiser.objects.all()
+                icontains = fundraisers.filter(Q(title__icontains="lighthouse") | Q(description__icontains="lighthouse"))
+                ranked = search.search(fundraisers, "lighthouse")
+
+                matches = len(list(ranked.values_list("id", flat=True)))
+                self.stdout.write(
+                    f"{size:>10} {matches:>8} {self.time(icontains, options['repeat']):>13.2f} "
+                    f"{self.time(ranked, options['repeat']):>13.2f}"
+                )
+                transaction.set_rollback(True)
+
+    def time(self, queryset, repeat):
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(queryset.values_list("id", flat=True))
+            best = min(best, time.perf_counter() - started)
+        return best * 1000
@@ -0,0 +1,71 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from fundraisers.models import Fundraiser, Pledge
+from fundraisers.serializers import FundraiserRowSerializer, FundraiserSerializer, PledgeRowSerializer, PledgeSerializer
+
+
+class Command(BaseCommand):
+    help = "Compare list serialization through DRF serializers and values() rows. Everything is rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fundraisers", type=int, default=5_000)
+        parser.add_argument("--pledges", type=int, default=20_000)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options["fundraisers"], options["pledges"])
+            cases = [
+                ("fundraisers", Fundraiser.objects.for_list(), FundraiserSerializer, FundraiserRowSerializer()),
+                ("pledges", Pledge.objects.select_related("supporter"), PledgeSerializer, PledgeRowSerializer()),
+            ]
+
+            self.stdout.write(f"{'list':<12} {'rows':>7} {'drf rows/s':>11} {'values rows/s':>14} {'speedup':>8}")
+            for name, queryset, serializer_class, rows in cases:
+                drf = lambda: JSONRenderer().render(serializer_class(queryset.all(), many=True).data)
+                fast = lambda: JSONRenderer().render(rows.serialize(rows.values(queryset.all())))
+                if drf() != fast():
+                    raise CommandError(f"{name}: fast output differs from the DRF serializer.")
+
+                count = queryset.count()
+                drf_seconds = self.time(drf, options["repeat"])
+                fast_seconds = self.time(fast, options["repeat"])
+                self.stdout.write(
+                    f"{name:<12} {count:>7} {count / drf_seconds:>11.0f} {count / fast_seconds:>14.0f} "
+                    f"{drf_seconds / fast_seconds:>7.1f}x"
+                )
+            transaction.set_rollback(True)
+
+    def seed(self, fundraiser_count, pledge_count):
+        rng = random.Random(1)
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(username=f"benchmark-serializers-{i}") for i in range(50)
+        )
+        fundraisers = Fundraiser.objects.bulk_create(
+            Fundraiser(
+                title=f"Fundraiser {i}",
+                description="Benchmark",
+                goal=rng.randint(1_000, 100_000),
+                image="https://example.com/image.png",
+                owner=rng.choice(users),
+            )
+            for i in range(fundraiser_count)
+        )
+        Pledge.objects.bulk_create(
+            Pledge(amount=rng.randint(1, 100), fundraiser=rng.choice(fundraisers), supporter=rng.choice(users))
+            for _ in range(pledge_count)
+        )
+
+    def time(self, render, repeat):
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            render()
+            best = min(best, time.perf_counter() - started)
+        return best
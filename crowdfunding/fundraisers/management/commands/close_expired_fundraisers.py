@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from fundraisers.models import Fundraiser
+from fundraisers.services import close_expired_fundraisers
+
+
+class Command(BaseCommand):
+    help = "Close open fundraisers whose deadline has passed. With --loop, keep running and wake at each deadline."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep running instead of exiting after one pass.")
+        parser.add_argument(
+            "--max-sleep",
+            type=float,
+            default=60,
+            help="Longest wait between passes in seconds, so newly created deadlines are picked up.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            closed = close_expired_fundraisers()
+            if closed or not options["loop"]:
+                self.stdout.write(f"Closed {closed} expired fundraisers.")
+            if not options["loop"]:
+                return
+            time.sleep(self.seconds_until_next_deadline(options["max_sleep"]))
+
+    def seconds_until_next_deadline(self, max_sleep):
+        deadline = Fundraiser.objects.next_deadline()
+        if deadline is None:
+            return max_sleep
+        return min(max_sleep, max(1.0, (deadline - timezone.now()).total_seconds()))
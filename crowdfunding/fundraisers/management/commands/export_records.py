@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from fundraisers.exports import CHUNK_SIZE, FORMATS, KINDS, export_lines
+
+FILTERS = ("fundraiser", "supporter", "owner", "anonymous", "is_open", "date_from", "date_to", "search")
+
+
+class Command(BaseCommand):
+    help = "Stream fundraisers or pledges to a CSV or JSON Lines file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(KINDS))
+        parser.add_argument("--output", "-o", default="-", help="File to write, or - for stdout.")
+        parser.add_argument("--format", choices=FORMATS, default="csv")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+        for name in FILTERS:
+            parser.add_argument(f"--{name.replace('_', '-')}", dest=name, help="Same as the list view's query parameter.")
+
+    def handle(self, *args, **options):
+        params = {name: options[name] for name in FILTERS if options[name] is not None}
+        try:
+            lines = export_lines(options["kind"], params, options["format"], options["chunk_size"])
+        except ValueError as exc:
+            raise CommandError(exc)
+
+        if options["output"] == "-":
+            for line in lines:
+                self.stdout.write(line, ending="")
+        else:
+            with open(options["output"], "w", newline="", encoding="utf-8") as output:
+                output.writelines(lines)
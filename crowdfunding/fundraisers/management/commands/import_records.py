@@ -0,0 +1,41 @@
+import json
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from fundraisers.imports import BATCH_SIZE, FORMATS, KINDS, import_rows, read_rows
+
+
+class Command(BaseCommand):
+    help = "Bulk import fundraisers or pledges from a CSV or JSON Lines file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(KINDS))
+        parser.add_argument("path", help="File to read, or - for stdin.")
+        parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension.")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument("--dry-run", action="store_true", help="Validate and roll back.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        format = options["format"] or os.path.splitext(path)[1].lstrip(".").lower()
+        if format not in FORMATS:
+            raise CommandError(f"Pass --format; cannot tell the format of {path!r}.")
+
+        if path == "-":
+            report = self.run(sys.stdin, format, options)
+        else:
+            with open(path, newline="", encoding="utf-8-sig") as lines:
+                report = self.run(lines, format, options)
+
+        for error in report["errors"]:
+            self.stderr.write(f"row {error['row']}: {json.dumps(error['errors'])}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Validated' if report['dry_run'] else 'Imported'} {report['created']} {report['kind']} "
+            f"({report['rejected']} rejected, {report['fundraisers']} fundraisers updated) "
+            f"in {report['seconds']}s, {report['rows_per_second'] or 0} rows/s."
+        ))
+
+    def run(self, lines, format, options):
+        return import_rows(options["kind"], read_rows(lines, format), options["batch_size"], options["dry_run"])
@@ -0,0 +1,92 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire concurrent requests at a running server and report throughput and latency, "
+        "e.g. /fundraisers/ on the WSGI workers against /async/fundraisers/ on the ASGI ones, "
+        "or POST /pledges/ with and without database connection pooling."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("urls", nargs="+", help="Absolute http:// URLs to compare.")
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+        parser.add_argument("--requests", type=int, default=500, help="Requests per URL and concurrency level.")
+        parser.add_argument("--timeout", type=float, default=30.0)
+        parser.add_argument("--method", default="GET")
+        parser.add_argument("--data", default="", help="JSON request body, e.g. for POST /pledges/.")
+        parser.add_argument("--token", help="Send Authorization: Token <token>.")
+
+    def handle(self, *args, **options):
+        for url in options["urls"]:
+            if urlsplit(url).scheme != "http":
+                raise CommandError(f"Only plain http:// URLs are supported: {url}")
+
+        self.stdout.write(f"{'url':<45} {'conc':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+        for url in options["urls"]:
+            for concurrency in options["concurrency"]:
+                result = asyncio.run(self.run(url, concurrency, options))
+                self.stdout.write(
+                    f"{url[-45:]:<45} {concurrency:>5} {result['rate']:>8.0f} "
+                    f"{result['p50']:>8.1f} {result['p95']:>8.1f} {result['errors']:>7}"
+                )
+
+    async def run(self, url, concurrency, options):
+        latencies, errors = [], 0
+        remaining = iter(range(options["requests"]))
+        request = self.build_request(url, options)
+
+        async def worker():
+            nonlocal errors
+            for _ in remaining:
+                started = time.perf_counter()
+                try:
+                    status = await asyncio.wait_for(self.send(url, request), options["timeout"])
+                except (OSError, asyncio.TimeoutError):
+                    status = None
+                if status is not None and 200 <= status < 300:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            "rate": len(latencies) / elapsed,
+            "p50": statistics.median(latencies) * 1000 if latencies else 0,
+            "p95": latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0,
+            "errors": errors,
+        }
+
+    def build_request(self, url, options):
+        parts = urlsplit(url)
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        body = options["data"].encode()
+        headers = [f"Host: {parts.netloc}", "Connection: close"]
+        if options["token"]:
+            headers.append(f"Authorization: Token {options['token']}")
+        if body:
+            headers += ["Content-Type: application/json", f"Content-Length: {len(body)}"]
+        head = f"{options['method'].upper()} {path} HTTP/1.1\r\n" + "".join(f"{header}\r\n" for header in headers)
+        return (head + "\r\n").encode() + body
+
+    async def send(self, url, request):
+        # A bare HTTP/1.1 client: one connection per request, body drained.
+        parts = urlsplit(url)
+        reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+        try:
+            writer.write(request)
+            await writer.drain()
+            status_line = await reader.readline()
+            await reader.read()
+            return int(status_line.split()[1])
+        finally:
+            writer.close()
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from fundraisers.analytics import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recalculate the hourly and daily pledge rollups from the pledges table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("fundraiser_ids", nargs="*", type=int, help="Only rebuild these fundraisers.")
+
+    def handle(self, *args, **options):
+        rebuild_rollups(options["fundraiser_ids"] or None)
+        self.stdout.write(self.style.SUCCESS("Rebuilt pledge rollups."))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from crowdfunding import response_cache
+from fundraisers import events
+from fundraisers.models import Fundraiser
+
+
+class Command(BaseCommand):
+    help = "Recalculate Fundraiser.total_pledged and pledge_count from the pledges table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("fundraiser_ids", nargs="*", type=int, help="Only rebuild these fundraisers.")
+
+    def handle(self, *args, **options):
+        fundraisers = Fundraiser.objects.all()
+        if options["fundraiser_ids"]:
+            fundraisers = fundraisers.filter(pk__in=options["fundraiser_ids"])
+
+        updated = Fundraiser.rebuild_totals(fundraisers)
+        reached = list(fundraisers.filter(is_open=True, total_pledged__gte=F("goal")).values_list("pk", flat=True))
+        closed = Fundraiser.objects.filter(pk__in=reached).touch(is_open=False)
+        # Queryset updates send no post_save, so drop cached pages and tell
+        # open event streams about the fundraisers that just closed.
+        response_cache.invalidate()
+        events.publish_on_commit(reached)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt totals for {updated} fundraisers ({closed} closed)."))
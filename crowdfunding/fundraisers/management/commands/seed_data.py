@@ -0,0 +1,179 @@
+import random
+import time
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from fundraisers.imports import bulk_create_keeping_timestamps, refresh_derived_data
+from fundraisers.models import Comment, Fundraiser, Pledge
+
+AMOUNTS = [5, 10, 20, 25, 50, 100, 250, 500, 1000]
+AMOUNT_WEIGHTS = [20, 25, 20, 12, 10, 7, 3, 2, 1]
+GOALS = [500, 1_000, 2_500, 5_000, 10_000, 25_000, 50_000, 100_000]
+WORDS = (
+    "beds meals blankets shelter winter school books water clinic garden library repairs "
+    "community volunteers kitchen roof heating bus trip instruments uniforms laptops"
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate realistic synthetic data: users, fundraisers, and pledges and comments that "
+        "concentrate on a few popular fundraisers, with nested replies. The same --seed gives the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1_000)
+        parser.add_argument("--fundraisers", type=int, default=200)
+        parser.add_argument("--pledges", type=int, default=20_000)
+        parser.add_argument("--comments", type=int, default=5_000)
+        parser.add_argument("--reply-share", type=float, default=0.5, help="Share of comments that are replies.")
+        parser.add_argument("--max-depth", type=int, default=4, help="Deepest reply level.")
+        parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent for popularity; 0 is uniform.")
+        parser.add_argument("--days", type=int, default=180, help="Spread creation dates over this many days.")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--prefix", default="seed", help="Username prefix; must not be in use.")
+        parser.add_argument("--batch-size", type=int, default=5_000)
+
+    def handle(self, *args, **options):
+        if options["users"] < 2 or options["fundraisers"] < 1:
+            raise CommandError("Need at least 2 users and 1 fundraiser.")
+        if get_user_model().objects.filter(username__startswith=f"{options['prefix']}-").exists():
+            raise CommandError(f"Users named {options['prefix']}-* exist already; pass another --prefix.")
+
+        self.rng = random.Random(options["seed"])
+        self.now = timezone.now()
+        self.batch_size = options["batch_size"]
+        started = time.perf_counter()
+        with transaction.atomic():
+            users = self.create_users(options["users"], options["prefix"], options["days"])
+            fundraisers = self.create_fundraisers(options["fundraisers"], users, options["skew"], options["days"])
+            pledges = self.create_pledges(options["pledges"], users, fundraisers, options["skew"])
+            comments = self.create_comments(
+                options["comments"], users, fundraisers, options["skew"], options["reply_share"], options["max_depth"],
+            )
+            for model in (get_user_model(), Fundraiser, Comment):
+                refresh_derived_data(model, [], self.now)
+            refresh_derived_data(Pledge, [fundraiser.pk for fundraiser in fundraisers], self.now)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(users)} users, {len(fundraisers)} fundraisers, {pledges} pledges and "
+            f"{comments} comments in {time.perf_counter() - started:.1f}s."
+        ))
+
+    def popularity(self, items, skew):
+        # Zipf: the item at rank r gets weight 1 / r**skew.
+        order = self.rng.sample(items, len(items))
+        return order, list(accumulate(1 / (rank + 1) ** skew for rank in range(len(order))))
+
+    def pick(self, popularity):
+        order, cum_weights = popularity
+        return self.rng.choices(order, cum_weights=cum_weights)[0]
+
+    def moment_after(self, start, end=None):
+        end = min(end or self.now, self.now)
+        if end <= start:
+            return start
+        return start + (end - start) * self.rng.random()
+
+    def text(self, words):
+        return " ".join(self.rng.choice(WORDS) for _ in range(words)).capitalize()
+
+    def create_users(self, count, prefix, days):
+        password = make_password(None)
+        users = [
+            get_user_model()(
+                username=f"{prefix}-{i}",
+                email=f"{prefix}-{i}@example.com",
+                password=password,
+                date_joined=self.now - timedelta(days=days * self.rng.random()),
+            )
+            for i in range(count)
+        ]
+        return get_user_model().objects.bulk_create(users, batch_size=self.batch_size)
+
+    def create_fundraisers(self, count, users, skew, days):
+        owners = self.popularity(users, skew)
+        fundraisers = []
+        for _ in range(count):
+            owner = self.pick(owners)
+            created = self.moment_after(max(owner.date_joined, self.now - timedelta(days=days)))
+            deadline = created + timedelta(days=self.rng.randint(7, 90)) if self.rng.random() < 0.6 else None
+            fundraisers.append(Fundraiser(
+                title=self.text(3),
+                description=self.text(self.rng.randint(10, 60)),
+                goal=self.rng.choice(GOALS),
+                image=f"https://picsum.photos/seed/{self.rng.randint(1, 10**6)}/600/400",
+                owner=owner,
+                deadline=deadline,
+                date_created=created,
+            ))
+        return bulk_create_keeping_timestamps(Fundraiser, fundraisers, self.batch_size)
+
+    def create_pledges(self, count, users, fundraisers, skew):
+        # Pledges stop at each goal and deadline, as admit_pledge would.
+        targets = self.popularity(fundraisers, skew)
+        supporters = self.popularity(users, skew)
+        remaining = {fundraiser.pk: fundraiser.goal for fundraiser in fundraisers}
+        pledges = []
+        for _ in range(count * 2):
+            if len(pledges) == count:
+                break
+            fundraiser = self.pick(targets)
+            supporter = self.pick(supporters)
+            amount = min(self.rng.choices(AMOUNTS, AMOUNT_WEIGHTS)[0], remaining[fundraiser.pk])
+            if supporter.pk == fundraiser.owner_id or amount == 0:
+                continue
+            remaining[fundraiser.pk] -= amount
+            pledges.append(Pledge(
+                fundraiser=fundraiser,
+                supporter=supporter,
+                amount=amount,
+                anonymous=self.rng.random() < 0.2,
+                comment=self.text(self.rng.randint(2, 12)) if self.rng.random() < 0.3 else "",
+                date_created=self.moment_after(fundraiser.date_created, fundraiser.deadline),
+            ))
+        bulk_create_keeping_timestamps(Pledge, pledges, self.batch_size)
+        return len(pledges)
+
+    def create_comments(self, count, users, fundraisers, skew, reply_share, max_depth):
+        # Plan the forest first, then insert one level at a time so every
+        # reply's parent already has a primary key.
+        targets = self.popularity(fundraisers, skew)
+        authors = self.popularity(users, skew)
+        planned = []  # (fundraiser, depth, parent index)
+        threads = {}  # fundraiser pk -> indexes of its comments that can take replies
+        for _ in range(count):
+            fundraiser = self.pick(targets)
+            candidates = threads.get(fundraiser.pk)
+            if candidates and self.rng.random() < reply_share:
+                parent = self.rng.choice(candidates)
+                planned.append((fundraiser, planned[parent][1] + 1, parent))
+            else:
+                planned.append((fundraiser, 0, None))
+            if planned[-1][1] < max_depth:
+                threads.setdefault(fundraiser.pk, []).append(len(planned) - 1)
+
+        comments = [None] * len(planned)
+        for depth in range(max_depth + 1):
+            level = []
+            for index, (fundraiser, comment_depth, parent) in enumerate(planned):
+                if comment_depth != depth:
+                    continue
+                after = comments[parent].date_created if parent is not None else fundraiser.date_created
+                comments[index] = Comment(
+                    fundraiser=fundraiser,
+                    author=self.pick(authors),
+                    parent=comments[parent] if parent is not None else None,
+                    content=self.text(self.rng.randint(3, 40)),
+                    anonymous=self.rng.random() < 0.1,
+                    date_created=self.moment_after(after),
+                )
+                level.append(comments[index])
+            bulk_create_keeping_timestamps(Comment, level, self.batch_size)
+        return len(comments)
@@ -0,0 +1,36 @@
+# Generated by Django 5.1 on 2026-10-18 04:18
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_totals(apps, schema_editor):
+    Fundraiser = apps.get_model('fundraisers', 'Fundraiser')
+    Pledge = apps.get_model('fundraisers', 'Pledge')
+    pledges = Pledge.objects.filter(fundraiser=OuterRef('pk')).order_by().values('fundraiser')
+    Fundraiser.objects.update(
+        total_pledged=Coalesce(Subquery(pledges.annotate(total=Sum('amount')).values('total')), Value(0)),
+        pledge_count=Coalesce(Subquery(pledges.annotate(count=Count('pk')).values('count')), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fundraisers', '0005_alter_fundraiser_is_open'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fundraiser',
+            name='pledge_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='fundraiser',
+            name='total_pledged',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
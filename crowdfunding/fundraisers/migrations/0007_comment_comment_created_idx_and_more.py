@@ -0,0 +1,27 @@
+# Generated by Django 5.1 on 2026-10-18 04:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fundraisers', '0006_fundraiser_pledge_count_fundraiser_total_pledged'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['date_created', 'id'], name='comment_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fundraiser',
+            index=models.Index(fields=['date_created', 'id'], name='fundraiser_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pledge',
+            index=models.Index(fields=['date_created', 'id'], name='pledge_created_idx'),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations
+
+import crowdfunding.search
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fundraisers', '0007_comment_comment_created_idx_and_more'),
+    ]
+
+    operations = [
+        crowdfunding.search.CreateSearchIndex('fundraiser', ['title', 'description']),
+        crowdfunding.search.CreateSearchIndex('pledge', ['comment']),
+        crowdfunding.search.CreateSearchIndex('comment', ['content']),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.1 on 2026-10-18 04:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fundraisers', '0008_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['fundraiser', 'date_created'], name='comment_fundraiser_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['author', 'date_created'], name='comment_author_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fundraiser',
+            index=models.Index(fields=['owner', 'date_created'], name='fundraiser_owner_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fundraiser',
+            index=models.Index(fields=['is_open', 'goal'], name='fundraiser_open_goal_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fundraiser',
+            index=models.Index(fields=['goal'], name='fundraiser_goal_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fundraiser',
+            index=models.Index(fields=['deadline'], name='fundraiser_deadline_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fundraiser',
+            index=models.Index(condition=models.Q(('is_open', True)), fields=['deadline', 'id'], name='fundraiser_open_deadline_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pledge',
+            index=models.Index(fields=['fundraiser', 'date_created'], name='pledge_fundraiser_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pledge',
+            index=models.Index(fields=['supporter', 'date_created'], name='pledge_supporter_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pledge',
+            index=models.Index(fields=['fundraiser', 'supporter'], name='pledge_fundraiser_user_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.1 on 2026-10-18 04:27
+
+import django.db.models.deletion
+import django.db.models.expressions
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncHour
+
+
+def backfill_hourly_stats(apps, schema_editor):
+    Pledge = apps.get_model('fundraisers', 'Pledge')
+    HourlyPledgeStat = apps.get_model('fundraisers', 'HourlyPledgeStat')
+    rows = (
+        Pledge.objects.annotate(hour=TruncHour('date_created'))
+        .values('fundraiser_id', 'hour')
+        .annotate(amount=Sum('amount'), pledge_count=Count('id'))
+        .order_by()
+    )
+    HourlyPledgeStat.objects.bulk_create((HourlyPledgeStat(**row) for row in rows.iterator()), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fundraisers', '0010_fundraiser_version_date_updated'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HourlyPledgeStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('amount', models.IntegerField(default=0)),
+                ('pledge_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='fundraiser',
+            index=models.Index(fields=['-total_pledged', 'id'], name='fundraiser_funded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fundraiser',
+            index=models.Index(django.db.models.expressions.CombinedExpression(models.F('goal'), '-', models.F('total_pledged')), models.F('id'), condition=models.Q(('is_open', True)), name='fundraiser_remaining_idx'),
+        ),
+        migrations.AddField(
+            model_name='hourlypledgestat',
+            name='fundraiser',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hourly_stats', to='fundraisers.fundraiser'),
+        ),
+        migrations.AddIndex(
+            model_name='hourlypledgestat',
+            index=models.Index(fields=['hour', 'fundraiser', 'amount'], name='hourly_stat_hour_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='hourlypledgestat',
+            constraint=models.UniqueConstraint(fields=('fundraiser', 'hour'), name='unique_fundraiser_hour'),
+        ),
+        migrations.RunPython(backfill_hourly_stats, migrations.RunPython.noop),
+    ]
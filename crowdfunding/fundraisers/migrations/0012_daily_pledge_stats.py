@@ -0,0 +1,63 @@
+# Generated by Django 5.1 on 2026-10-18 04:29
+
+import django.db.models.deletion
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Min
+from django.utils import timezone
+
+
+def backfill_rollups(apps, schema_editor):
+    Pledge = apps.get_model('fundraisers', 'Pledge')
+    buckets = [
+        (apps.get_model('fundraisers', 'HourlyPledgeStat'), 'hour', lambda when: when.replace(minute=0, second=0, microsecond=0)),
+        (apps.get_model('fundraisers', 'DailyPledgeStat'), 'day', lambda when: timezone.localtime(when).date()),
+    ]
+    firsts = list(Pledge.objects.order_by().values('fundraiser_id', 'supporter_id').annotate(first=Min('date_created')))
+    for Stat, field, truncate in buckets:
+        Stat.objects.all().delete()
+        amounts, counts = Counter(), Counter()
+        for pledge in Pledge.objects.values('fundraiser_id', 'date_created', 'amount').iterator(chunk_size=5000):
+            key = (pledge['fundraiser_id'], truncate(pledge['date_created']))
+            amounts[key] += pledge['amount']
+            counts[key] += 1
+        new_supporters = Counter((row['fundraiser_id'], truncate(row['first'])) for row in firsts)
+        Stat.objects.bulk_create(
+            [
+                Stat(fundraiser_id=fundraiser_id, amount=amount, pledge_count=counts[fundraiser_id, bucket],
+                     new_supporters=new_supporters[fundraiser_id, bucket], **{field: bucket})
+                for (fundraiser_id, bucket), amount in amounts.items()
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fundraisers', '0011_rankings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hourlypledgestat',
+            name='new_supporters',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='DailyPledgeStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.IntegerField(default=0)),
+                ('pledge_count', models.IntegerField(default=0)),
+                ('new_supporters', models.IntegerField(default=0)),
+                ('day', models.DateField()),
+                ('fundraiser', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='fundraisers.fundraiser')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('fundraiser', 'day'), name='unique_fundraiser_day')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
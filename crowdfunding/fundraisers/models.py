@@ -1,9 +1,37 @@
 from django.contrib.auth import get_user_model
-from django.db import models
-from django.db.models import Sum
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, models, transaction
+from django.db.models import Case, Count, F, OuterRef, Prefetch, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 
+class FundraiserQuerySet(models.QuerySet):
+    def touch(self, **updates):
+        """UPDATE that also bumps the version and date_updated used for ETags."""
+        return self.update(version=F("version") + 1, date_updated=timezone.now(), **updates)
+
+    def expired(self, now=None):
+        # Served by the partial (deadline, id) WHERE is_open index.
+        return self.filter(is_open=True, deadline__lte=now or timezone.now())
+
+    def next_deadline(self):
+        return (
+            self.filter(is_open=True, deadline__isnull=False)
+            .order_by("deadline", "id")
+            .values_list("deadline", flat=True)
+            .first()
+        )
+
+    def for_list(self):
+        return self.select_related("owner")
+
+    def for_detail(self):
+        return self.for_list().prefetch_related(
+            Prefetch("pledges", queryset=Pledge.objects.select_related("supporter").order_by("id")),
+        )
+
+
 class Fundraiser(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField()
@@ -12,6 +40,10 @@ class Fundraiser(models.Model):
     is_open = models.BooleanField(default=True)
     date_created = models.DateTimeField(auto_now_add=True)
     deadline = models.DateTimeField(null=True, blank=True)
+    total_pledged = models.IntegerField(default=0)
+    pledge_count = models.IntegerField(default=0)
+    version = models.PositiveIntegerField(default=0)
+    date_updated = models.DateTimeField(auto_now=True)
 
     owner = models.ForeignKey(
         get_user_model(),
@@ -19,17 +51,77 @@ class Fundraiser(models.Model):
         related_name="owned_fundraisers",
     )
 
+    objects = FundraiserQuerySet.as_manager()
+
+    COUNTER_FIELDS = ("total_pledged", "pledge_count")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["date_created", "id"], name="fundraiser_created_idx"),
+            models.Index(fields=["owner", "date_created"], name="fundraiser_owner_idx"),
+            models.Index(fields=["is_open", "goal"], name="fundraiser_open_goal_idx"),
+            models.Index(fields=["goal"], name="fundraiser_goal_idx"),
+            models.Index(fields=["deadline"], name="fundraiser_deadline_idx"),
+            # Open fundraisers by deadline: "ending soon" and closing expired ones.
+            models.Index(fields=["deadline", "id"], condition=Q(is_open=True), name="fundraiser_open_deadline_idx"),
+            # Rankings: most funded, and open fundraisers by amount still needed.
+            models.Index(fields=["-total_pledged", "id"], name="fundraiser_funded_idx"),
+            models.Index(
+                F("goal") - F("total_pledged"), F("id"), condition=Q(is_open=True), name="fundraiser_remaining_idx",
+            ),
+        ]
+
     def __str__(self):
         return self.title
 
-    def total_pledged(self):
-        return self.pledges.aggregate(total=Sum("amount"))["total"] or 0
+    def save(self, *args, **kwargs):
+        # Bumped in the database, like touch(), so concurrent or stale saves
+        # never write the same version for different rows (ETags).
+        adding = self._state.adding
+        self.version = 1 if adding else F("version") + 1
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None and not adding:
+            # The totals only change through F() updates (apply_pledge,
+            # rebuild_totals); writing this instance's copy back would undo
+            # pledges made since it was loaded.
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "version", "date_updated"}
+        super().save(*args, **kwargs)
+        if not adding:
+            self.refresh_from_db(fields=["version"])
+
+    @classmethod
+    def rebuild_totals(cls, fundraisers=None):
+        # Recompute the stored totals from the pledges table in one UPDATE.
+        pledges = Pledge.objects.filter(fundraiser=OuterRef("pk")).order_by().values("fundraiser")
+        fundraisers = cls.objects.all() if fundraisers is None else fundraisers
+        return fundraisers.touch(
+            total_pledged=Coalesce(Subquery(pledges.annotate(total=Sum("amount")).values("total")), Value(0)),
+            pledge_count=Coalesce(Subquery(pledges.annotate(count=Count("pk")).values("count")), Value(0)),
+        )
+
+    def apply_pledge(self, amount, count=1):
+        # F() keeps concurrent pledges from overwriting each other's totals, and
+        # the goal check happens inside the same UPDATE.
+        Fundraiser.objects.filter(pk=self.pk).touch(
+            total_pledged=F("total_pledged") + amount,
+            pledge_count=F("pledge_count") + count,
+            is_open=Case(
+                When(total_pledged__gte=F("goal") - amount, then=Value(False)),
+                default=F("is_open"),
+            ),
+        )
+        self.refresh_from_db(fields=["total_pledged", "pledge_count", "is_open", "version", "date_updated"])
 
     def is_deadline_passed(self):
         return self.deadline is not None and timezone.now() >= self.deadline
 
     def is_goal_reached(self):
-        return self.total_pledged() >= self.goal
+        return self.total_pledged >= self.goal
 
     def is_accepting_pledges(self):
         return self.is_open and not self.is_deadline_passed() and not self.is_goal_reached()
@@ -66,12 +158,34 @@ class Pledge(models.Model):
     comment = models.TextField(blank=True)
     date_created = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["date_created", "id"], name="pledge_created_idx"),
+            models.Index(fields=["fundraiser", "date_created"], name="pledge_fundraiser_idx"),
+            models.Index(fields=["supporter", "date_created"], name="pledge_supporter_idx"),
+            models.Index(fields=["fundraiser", "supporter"], name="pledge_fundraiser_user_idx"),
+        ]
+
     def __str__(self):
         return f"{self.amount} to {self.fundraiser}"
 
-    def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        self.fundraiser.refresh_open_status(save=True)
+    def save(self, *args, update_totals=True, **kwargs):
+        if not update_totals:
+            # The caller has already applied this pledge to the fundraiser's totals.
+            return super().save(*args, **kwargs)
+
+        with transaction.atomic():
+            if self._state.adding:
+                delta, count = self.amount, 1
+            else:
+                previous = Pledge.objects.filter(pk=self.pk).values_list("amount", flat=True).first() or 0
+                delta, count = self.amount - previous, 0
+                # Saves the rollup handlers from loading it again.
+                self._previous_amount = previous
+            super().save(*args, **kwargs)
+            if delta or count:
+                self.fundraiser.apply_pledge(delta, count)
+            self.fundraiser.refresh_open_status(save=True)
 
 
 class Comment(models.Model):
@@ -96,5 +210,163 @@ class Comment(models.Model):
     anonymous = models.BooleanField(default=False)
     date_created = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["date_created", "id"], name="comment_created_idx"),
+            models.Index(fields=["fundraiser", "date_created"], name="comment_fundraiser_idx"),
+            models.Index(fields=["author", "date_created"], name="comment_author_idx"),
+        ]
+
     def __str__(self):
         return self.content[:30]
+
+    @classmethod
+    def load_tree(cls, fundraiser_id):
+        """Fetch a fundraiser's comments in one query and link them up in memory.
+
+        Returns the top-level comments and a dict of parent id -> replies.
+        """
+        return cls.link_tree(list(cls.tree_queryset(fundraiser_id)))
+
+    @classmethod
+    async def aload_tree(cls, fundraiser_id):
+        return cls.link_tree([comment async for comment in cls.tree_queryset(fundraiser_id)])
+
+    @classmethod
+    def tree_queryset(cls, fundraiser_id):
+        return cls.objects.filter(fundraiser_id=fundraiser_id).select_related("author").order_by("date_created", "id")
+
+    @staticmethod
+    def link_tree(comments):
+        ids = {comment.pk for comment in comments}
+        roots, children = [], {}
+        for comment in comments:
+            if comment.parent_id in ids:
+                children.setdefault(comment.parent_id, []).append(comment)
+            else:
+                roots.append(comment)
+        return roots, children
+
+
+class PledgeStat(models.Model):
+    """Base for per-fundraiser pledge rollups, maintained as pledges are made.
+
+    new_supporters counts supporters whose first pledge to the fundraiser
+    fell in the bucket, so a running sum gives the supporter count over time.
+    """
+
+    bucket_field = None
+
+    amount = models.IntegerField(default=0)
+    pledge_count = models.IntegerField(default=0)
+    new_supporters = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def truncate(cls, when):
+        raise NotImplementedError
+
+    @classmethod
+    def record(cls, fundraiser_id, when, amount, count=1, new_supporters=0, using="default"):
+        # One upsert statement; the ORM's bulk_create(update_conflicts=True)
+        # can only overwrite columns, not add to them.
+        connection = connections[using]
+        table = connection.ops.quote_name(cls._meta.db_table)
+        bucket = connection.ops.quote_name(cls.bucket_field)
+        field = cls._meta.get_field(cls.bucket_field)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (fundraiser_id, {bucket}, amount, pledge_count, new_supporters) "
+                f"VALUES (%s, %s, %s, %s, %s) "
+                f"ON CONFLICT (fundraiser_id, {bucket}) DO UPDATE SET "
+                f"amount = {table}.amount + excluded.amount, "
+                f"pledge_count = {table}.pledge_count + excluded.pledge_count, "
+                f"new_supporters = {table}.new_supporters + excluded.new_supporters",
+                [
+                    fundraiser_id,
+                    field.get_db_prep_value(cls.truncate(when), connection),
+                    amount,
+                    count,
+                    new_supporters,
+                ],
+            )
+
+    @classmethod
+    def remove(cls, fundraiser_id, when, amount, count=1, new_supporters=0, using="default"):
+        # A plain UPDATE rather than record(): during a cascade the rows may
+        # already be gone, and an upsert would re-create them.
+        cls.objects.using(using).filter(fundraiser_id=fundraiser_id, **{cls.bucket_field: cls.truncate(when)}).update(
+            amount=F("amount") - amount,
+            pledge_count=F("pledge_count") - count,
+            new_supporters=F("new_supporters") - new_supporters,
+        )
+
+
+class HourlyPledgeStat(PledgeStat):
+    bucket_field = "hour"
+
+    fundraiser = models.ForeignKey(
+        Fundraiser,
+        on_delete=models.CASCADE,
+        related_name="hourly_stats",
+    )
+    hour = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["fundraiser", "hour"], name="unique_fundraiser_hour"),
+        ]
+        indexes = [
+            models.Index(fields=["hour", "fundraiser", "amount"], name="hourly_stat_hour_idx"),
+        ]
+
+    @classmethod
+    def truncate(cls, when):
+        return when.replace(minute=0, second=0, microsecond=0)
+
+
+class DailyPledgeStat(PledgeStat):
+    bucket_field = "day"
+
+    fundraiser = models.ForeignKey(
+        Fundraiser,
+        on_delete=models.CASCADE,
+        related_name="daily_stats",
+    )
+    day = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["fundraiser", "day"], name="unique_fundraiser_day"),
+        ]
+
+    @classmethod
+    def truncate(cls, when):
+        return timezone.localtime(when).date()
+
+
+class IdempotencyKey(models.Model):
+    """The stored response to a POST sent with an Idempotency-Key header."""
+
+    user = models.ForeignKey(
+        get_user_model(),
+        on_delete=models.CASCADE,
+        related_name="idempotency_keys",
+    )
+    path = models.CharField(max_length=255)
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField()
+    response = models.JSONField(encoder=DjangoJSONEncoder)
+    date_created = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "path", "key"], name="unique_idempotency_key"),
+        ]
+        indexes = [
+            models.Index(fields=["expires_at"], name="idempotency_expires_idx"),
+        ]
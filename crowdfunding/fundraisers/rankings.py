@@ -0,0 +1,66 @@
+"""Top-K fundraiser rankings served from indexes and hourly pledge stats.
+
+Each ranking reads at most ``limit`` rows off an index (or, for trending, the
+last few hours of HourlyPledgeStat), so the cost does not grow with the number
+of pledges.
+"""
+from datetime import timedelta
+
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import Fundraiser, HourlyPledgeStat
+
+MAX_LIMIT = 100
+MAX_HOURS = 24 * 7
+
+
+def most_funded(limit):
+    return list(Fundraiser.objects.for_list().order_by("-total_pledged", "id")[:limit])
+
+
+def closest_to_goal(limit):
+    # Smallest amount still needed; fundraisers close as soon as the goal is met.
+    return list(
+        Fundraiser.objects.for_list()
+        .filter(is_open=True)
+        .order_by(F("goal") - F("total_pledged"), F("id"))[:limit]
+    )
+
+
+def ending_soon(limit):
+    return list(
+        Fundraiser.objects.for_list()
+        .filter(is_open=True, deadline__gt=timezone.now())
+        .order_by("deadline", "id")[:limit]
+    )
+
+
+def trending(limit, hours=24):
+    """Open fundraisers with the most pledged in the last ``hours`` hours."""
+    since = timezone.now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=hours - 1)
+    velocities = list(
+        HourlyPledgeStat.objects.filter(hour__gte=since, fundraiser__is_open=True)
+        .values("fundraiser")
+        .annotate(recent=Sum("amount"))
+        .filter(recent__gt=0)
+        .order_by("-recent", "fundraiser")
+        .values_list("fundraiser", "recent")[:limit]
+    )
+    fundraisers = Fundraiser.objects.for_list().in_bulk([pk for pk, _ in velocities])
+    ranked = []
+    for pk, recent in velocities:
+        fundraiser = fundraisers.get(pk)
+        if fundraiser is None:
+            continue  # Deleted since the stats were read.
+        fundraiser.recent_pledged = recent
+        ranked.append(fundraiser)
+    return ranked
+
+
+RANKINGS = {
+    "most-funded": most_funded,
+    "closest-to-goal": closest_to_goal,
+    "ending-soon": ending_soon,
+    "trending": trending,
+}
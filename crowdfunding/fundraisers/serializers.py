@@ -1,5 +1,8 @@
 from rest_framework import serializers
 from django.apps import apps
+from django.utils import timezone
+
+from crowdfunding.row_serializers import RowSerializer
 
 
 class PledgeSerializer(serializers.ModelSerializer):
@@ -28,7 +31,18 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
     def get_replies(self, instance):
-        serializer = CommentSerializer(instance.replies.all(), many=True)
+        children = self.context.get("children")
+        if children is None:
+            serializer = CommentSerializer(instance.replies.all(), many=True)
+            return serializer.data
+
+        # Tree mode: replies were loaded up front by Comment.load_tree().
+        depth = self.context.get("depth", 1)
+        max_depth = self.context.get("max_depth")
+        if max_depth is not None and depth >= max_depth:
+            return []
+        context = {**self.context, "depth": depth + 1}
+        serializer = CommentSerializer(children.get(instance.pk, []), many=True, context=context)
         return serializer.data
 
     def update(self, instance, validated_data):
@@ -42,26 +56,20 @@ class FundraiserSerializer(serializers.ModelSerializer):
     owner = serializers.ReadOnlyField(source="owner.id")
     owner_username = serializers.ReadOnlyField(source="owner.username")
 
-    total_pledged = serializers.SerializerMethodField()
     progress = serializers.SerializerMethodField()
     computed_is_open = serializers.SerializerMethodField()
 
     class Meta:
         model = apps.get_model("fundraisers.Fundraiser")
         fields = "__all__"
-
-    def get_total_pledged(self, instance):
-        try:
-            return instance.total_pledged()
-        except Exception:
-            return 0
+        read_only_fields = ["total_pledged", "pledge_count", "version", "date_updated"]
 
     def get_progress(self, instance):
         try:
             goal = instance.goal or 0
             if goal <= 0:
                 return 0
-            return min(100, round((instance.total_pledged() / goal) * 100))
+            return min(100, round((instance.total_pledged / goal) * 100))
         except Exception:
             return 0
 
@@ -74,7 +82,30 @@ class FundraiserSerializer(serializers.ModelSerializer):
             return False
 
 
+class PledgeRowSerializer(RowSerializer):
+    serializer_class = PledgeSerializer
+
+
+class FundraiserRowSerializer(RowSerializer):
+    serializer_class = FundraiserSerializer
+
+    # Same rules as FundraiserSerializer's method fields, on a values() row.
+    def get_progress(self, row):
+        goal = row["goal"] or 0
+        if goal <= 0:
+            return 0
+        return min(100, round((row["total_pledged"] / goal) * 100))
+
+    def get_computed_is_open(self, row):
+        deadline_passed = row["deadline"] is not None and timezone.now() >= row["deadline"]
+        if deadline_passed or row["total_pledged"] >= row["goal"]:
+            return False
+        return bool(row["is_open"])
+
+
 class FundraiserDetailSerializer(FundraiserSerializer):
+    EDITABLE_FIELDS = ("title", "description", "goal", "image", "is_open", "deadline")
+
     pledges = PledgeSerializer(many=True, read_only=True)
     days_left = serializers.SerializerMethodField()
 
@@ -91,5 +122,6 @@ class FundraiserDetailSerializer(FundraiserSerializer):
         instance.image = validated_data.get("image", instance.image)
         instance.is_open = validated_data.get("is_open", instance.is_open)
         instance.deadline = validated_data.get("deadline", instance.deadline)
-        instance.save()
+        # Only the edited columns: a full-row save would write back stale totals.
+        instance.save(update_fields=[field for field in self.EDITABLE_FIELDS if field in validated_data])
         return instance
@@ -0,0 +1,79 @@
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+
+from crowdfunding import response_cache
+from . import events
+from .models import Fundraiser, Pledge
+
+
+class PledgeRejected(Exception):
+    pass
+
+
+def admit_pledge(supporter, fundraiser, amount, **pledge_data):
+    """Record a pledge only if the fundraiser can still take it.
+
+    The goal check and the totals update are one conditional UPDATE, so two
+    workers racing for the last dollars cannot both get in. An admitted pledge
+    costs that UPDATE plus the INSERT; rejections lock the row to work out why.
+    """
+    if fundraiser.owner_id == supporter.pk:
+        raise PledgeRejected("You cannot pledge to your own fundraiser.")
+
+    now = timezone.now()
+    with transaction.atomic():
+        admitted = Fundraiser.objects.filter(
+            Q(deadline__isnull=True) | Q(deadline__gt=now),
+            pk=fundraiser.pk,
+            is_open=True,
+            total_pledged__lte=F("goal") - amount,
+        ).touch(
+            total_pledged=F("total_pledged") + amount,
+            pledge_count=F("pledge_count") + 1,
+            is_open=Case(
+                When(total_pledged__gte=F("goal") - amount, then=Value(False)),
+                default=Value(True),
+            ),
+        )
+        if admitted:
+            pledge = Pledge(supporter=supporter, fundraiser=fundraiser, amount=amount, **pledge_data)
+            pledge.save(update_totals=False)
+            return pledge
+
+        reason = _rejection_reason(fundraiser.pk, amount, now)
+
+    raise PledgeRejected(reason)
+
+
+def _rejection_reason(fundraiser_id, amount, now):
+    fundraiser = Fundraiser.objects.select_for_update().get(pk=fundraiser_id)
+
+    if fundraiser.deadline and now >= fundraiser.deadline:
+        fundraiser.is_open = False
+        fundraiser.save(update_fields=["is_open"])
+        return "This fundraiser has reached its deadline and is now closed."
+
+    if fundraiser.total_pledged >= fundraiser.goal:
+        fundraiser.is_open = False
+        fundraiser.save(update_fields=["is_open"])
+        return "This fundraiser has already reached its target and is now closed."
+
+    if not fundraiser.is_open:
+        return "This fundraiser is closed."
+
+    return "This fundraiser only needs the remaining target amount."
+
+
+def close_expired_fundraisers(now=None):
+    """Close every open fundraiser whose deadline has passed, in one UPDATE."""
+    now = now or timezone.now()
+    expired = list(Fundraiser.objects.expired(now).values_list("pk", flat=True))
+    if not expired:
+        return 0
+    closed = Fundraiser.objects.filter(pk__in=expired).expired(now).touch(is_open=False)
+    # A queryset UPDATE sends no post_save, so drop cached pages and tell
+    # open event streams here.
+    response_cache.invalidate()
+    events.publish_on_commit(expired)
+    return closed
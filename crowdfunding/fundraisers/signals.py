@@ -0,0 +1,146 @@
+from django.conf import settings
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from crowdfunding import response_cache
+from . import events
+from .analytics import rebuild_rollups
+from .models import Comment, DailyPledgeStat, Fundraiser, HourlyPledgeStat, Pledge
+
+
+# Deleting a fundraiser or a user cascades to any number of pledges and
+# comments. Rather than adjusting totals and rollups once per row, the
+# fundraiser and user handlers below do it once for the whole delete and mark
+# the fundraisers they cover on the delete's origin; the per-row handlers skip
+# those.
+
+def _mark_handled(origin, fundraiser_ids):
+    if origin is not None:
+        origin._handled_fundraisers = {*getattr(origin, "_handled_fundraisers", ()), *fundraiser_ids}
+
+
+def _unmark_handled(origin, fundraiser_ids):
+    getattr(origin, "_handled_fundraisers", set()).difference_update(fundraiser_ids)
+
+
+def _handled_in_bulk(instance, origin):
+    return getattr(instance, "fundraiser_id", None) in getattr(origin, "_handled_fundraisers", ())
+
+
+@receiver(pre_delete, sender=Fundraiser)
+def clear_fundraiser_rollups(sender, instance, using, origin=None, **kwargs):
+    for stat in (HourlyPledgeStat, DailyPledgeStat):
+        stat.objects.using(using).filter(fundraiser_id=instance.pk).delete()
+    _mark_handled(origin, [instance.pk])
+
+
+@receiver(post_delete, sender=Fundraiser)
+def forget_deleted_fundraiser(sender, instance, origin=None, **kwargs):
+    # Its pledges and comments were deleted (and signalled) before it.
+    _unmark_handled(origin, [instance.pk])
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def collect_supported_fundraisers(sender, instance, using, origin=None, **kwargs):
+    pledged = set(Pledge.objects.using(using).filter(supporter=instance).values_list("fundraiser_id", flat=True))
+    commented = set(Comment.objects.using(using).filter(author=instance).values_list("fundraiser_id", flat=True))
+    instance._supported_fundraisers = pledged, commented
+    _mark_handled(origin, pledged | commented)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def refresh_supported_fundraisers(sender, instance, using, origin=None, **kwargs):
+    pledged, commented = instance.__dict__.pop("_supported_fundraisers", (set(), set()))
+    if pledged:
+        Fundraiser.rebuild_totals(Fundraiser.objects.using(using).filter(pk__in=pledged))
+        rebuild_rollups(pledged)
+        events.publish_on_commit(pledged, using=using)
+    # Comment lists are validated against the fundraiser's version.
+    Fundraiser.objects.using(using).filter(pk__in=commented - pledged).touch()
+    if pledged or commented:
+        response_cache.invalidate()
+    _unmark_handled(origin, pledged | commented)
+
+
+@receiver(post_delete, sender=Pledge)
+def remove_pledge_from_totals(sender, instance, origin=None, **kwargs):
+    if _handled_in_bulk(instance, origin):
+        return
+    Fundraiser.objects.filter(pk=instance.fundraiser_id).touch(
+        total_pledged=F("total_pledged") - instance.amount,
+        pledge_count=F("pledge_count") - 1,
+    )
+
+
+@receiver(pre_save, sender=Pledge)
+def remember_previous_amount(sender, instance, raw, using, update_fields, **kwargs):
+    if raw or instance._state.adding or hasattr(instance, "_previous_amount"):
+        return
+    if update_fields is not None and "amount" not in update_fields:
+        return
+    instance._previous_amount = (
+        Pledge.objects.using(using).filter(pk=instance.pk).values_list("amount", flat=True).first() or 0
+    )
+
+
+@receiver(post_save, sender=Pledge)
+def add_pledge_to_rollups(sender, instance, created, using, **kwargs):
+    if not created:
+        # An edited amount moves the pledge's original buckets by the difference.
+        delta = instance.amount - instance.__dict__.pop("_previous_amount", instance.amount)
+        if delta:
+            for stat in (HourlyPledgeStat, DailyPledgeStat):
+                stat.record(instance.fundraiser_id, instance.date_created, delta, count=0, using=using)
+        return
+    first = not Pledge.objects.using(using).filter(
+        fundraiser_id=instance.fundraiser_id, supporter_id=instance.supporter_id,
+    ).exclude(pk=instance.pk).exists()
+    for stat in (HourlyPledgeStat, DailyPledgeStat):
+        stat.record(instance.fundraiser_id, instance.date_created, instance.amount, new_supporters=int(first), using=using)
+
+
+@receiver(post_delete, sender=Pledge)
+def remove_pledge_from_rollups(sender, instance, using, origin=None, **kwargs):
+    if _handled_in_bulk(instance, origin):
+        return
+    # If the supporter still has other pledges here they stay counted; the
+    # rebuild_pledge_rollups command moves them to their new first bucket.
+    last = not Pledge.objects.using(using).filter(
+        fundraiser_id=instance.fundraiser_id, supporter_id=instance.supporter_id,
+    ).exists()
+    for stat in (HourlyPledgeStat, DailyPledgeStat):
+        stat.remove(instance.fundraiser_id, instance.date_created, instance.amount, new_supporters=int(last), using=using)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def touch_commented_fundraiser(sender, instance, origin=None, **kwargs):
+    # Comment lists are validated against the fundraiser's version.
+    if _handled_in_bulk(instance, origin):
+        return
+    Fundraiser.objects.filter(pk=instance.fundraiser_id).touch()
+
+
+@receiver(post_save, sender=Fundraiser)
+@receiver(post_delete, sender=Fundraiser)
+@receiver(post_save, sender=Pledge)
+@receiver(post_delete, sender=Pledge)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_response_cache(sender, instance, origin=None, **kwargs):
+    if not _handled_in_bulk(instance, origin):
+        response_cache.invalidate()
+
+
+@receiver(post_save, sender=Pledge)
+@receiver(post_delete, sender=Pledge)
+def publish_pledge_progress(sender, instance, using, origin=None, **kwargs):
+    if _handled_in_bulk(instance, origin):
+        return
+    events.publish_on_commit([instance.fundraiser_id], using=using)
+
+
+@receiver(post_save, sender=Fundraiser)
+def publish_fundraiser_progress(sender, instance, using, **kwargs):
+    events.publish_on_commit([instance.pk], using=using)
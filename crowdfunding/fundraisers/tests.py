@@ -1,3 +1,1519 @@
-from django.test import TestCase
+import asyncio
+import csv
+import json
+import uuid
+import os
+import re
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection
+from django.db.models import F, Sum
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.base import BaseHandler
+from django.http import HttpResponse
+from django.test import AsyncClient, AsyncRequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+from crowdfunding import metrics, pubsub, renderers, replicas, response_cache, throttling
+from crowdfunding.pagination import KeysetPagination
+from crowdfunding.staticfiles import StaticFilesMiddleware
+
+from . import events, idempotency
+from .imports import import_rows, read_rows
+from .management.commands.close_expired_fundraisers import Command as CloseExpiredCommand
+from .models import Comment, DailyPledgeStat, Fundraiser, HourlyPledgeStat, IdempotencyKey, Pledge
+from .serializers import FundraiserDetailSerializer
+from .services import PledgeRejected, admit_pledge
+
+
+class FundraiserTestMixin:
+    def make_user(self, username):
+        return get_user_model().objects.create_user(username=username)
+
+    def make_fundraiser(self, owner, goal=100, **kwargs):
+        return Fundraiser.objects.create(
+            title=kwargs.pop("title", "Warm beds"),
+            description=kwargs.pop("description", "Beds for the winter"),
+            goal=goal,
+            image="https://example.com/image.png",
+            owner=owner,
+            **kwargs,
+        )
+
+
+class PledgeTotalsTests(FundraiserTestMixin, TestCase):
+    def setUp(self):
+        self.owner = self.make_user("owner")
+        self.supporter = self.make_user("supporter")
+        self.fundraiser = self.make_fundraiser(self.owner, goal=100)
+
+    def test_saving_pledges_updates_totals(self):
+        Pledge.objects.create(amount=30, fundraiser=self.fundraiser, supporter=self.supporter)
+        Pledge.objects.create(amount=20, fundraiser=self.fundraiser, supporter=self.supporter)
+
+        self.fundraiser.refresh_from_db()
+        self.assertEqual(self.fundraiser.total_pledged, 50)
+        self.assertEqual(self.fundraiser.pledge_count, 2)
+        self.assertTrue(self.fundraiser.is_open)
+
+    def test_reaching_goal_closes_fundraiser(self):
+        Pledge.objects.create(amount=100, fundraiser=self.fundraiser, supporter=self.supporter)
+
+        self.fundraiser.refresh_from_db()
+        self.assertFalse(self.fundraiser.is_open)
+
+    def test_deleting_pledge_decrements_totals(self):
+        pledge = Pledge.objects.create(amount=40, fundraiser=self.fundraiser, supporter=self.supporter)
+        pledge.delete()
+
+        self.fundraiser.refresh_from_db()
+        self.assertEqual(self.fundraiser.total_pledged, 0)
+        self.assertEqual(self.fundraiser.pledge_count, 0)
+
+    def updates(self, queries):
+        return [query["sql"] for query in queries if query["sql"].startswith("UPDATE")]
+
+    def test_fundraiser_delete_skips_per_pledge_bookkeeping(self):
+        for number in range(5):
+            Pledge.objects.create(amount=10, fundraiser=self.fundraiser, supporter=self.make_user(f"s{number}"))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.fundraiser.delete()
+
+        self.assertEqual(self.updates(queries), [])
+        self.assertFalse(DailyPledgeStat.objects.exists())
+        self.assertFalse(HourlyPledgeStat.objects.exists())
+
+    def test_user_delete_rebuilds_supported_fundraisers_once(self):
+        other = self.make_fundraiser(self.owner, goal=1000)
+        for amount in (3, 4, 5):
+            Pledge.objects.create(amount=amount, fundraiser=self.fundraiser, supporter=self.supporter)
+        Pledge.objects.create(amount=6, fundraiser=other, supporter=self.supporter)
+        Pledge.objects.create(amount=10, fundraiser=self.fundraiser, supporter=self.owner)
+        Comment.objects.create(fundraiser=other, author=self.supporter, content="Good luck")
+        version = Fundraiser.objects.get(pk=other.pk).version
+
+        with CaptureQueriesContext(connection) as queries:
+            self.supporter.delete()
+
+        self.assertEqual(len(self.updates(queries)), 1)
+        self.fundraiser.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.fundraiser.total_pledged, self.fundraiser.pledge_count), (10, 1))
+        self.assertEqual((other.total_pledged, other.pledge_count), (0, 0))
+        self.assertGreater(other.version, version)
+        self.assertEqual(
+            list(DailyPledgeStat.objects.values_list("fundraiser_id", "amount", "pledge_count", "new_supporters")),
+            [(self.fundraiser.pk, 10, 1, 1)],
+        )
+
+    def test_rebuild_command_repairs_drifted_totals(self):
+        Pledge.objects.create(amount=40, fundraiser=self.fundraiser, supporter=self.supporter)
+        Fundraiser.objects.filter(pk=self.fundraiser.pk).update(total_pledged=0, pledge_count=7)
+
+        call_command("rebuild_pledge_totals", stdout=StringIO())
+
+        self.fundraiser.refresh_from_db()
+        self.assertEqual(self.fundraiser.total_pledged, 40)
+        self.assertEqual(self.fundraiser.pledge_count, 1)
+
+    def test_rebuild_command_closes_through_touch(self):
+        Pledge.objects.create(amount=40, fundraiser=self.fundraiser, supporter=self.supporter)
+        Fundraiser.objects.filter(pk=self.fundraiser.pk).update(goal=30, is_open=True)
+        version = Fundraiser.objects.get(pk=self.fundraiser.pk).version
+
+        with mock.patch("fundraisers.events.publish_on_commit") as publish, \
+                mock.patch("crowdfunding.response_cache.invalidate") as invalidate:
+            call_command("rebuild_pledge_totals", stdout=StringIO())
+
+        self.fundraiser.refresh_from_db()
+        self.assertFalse(self.fundraiser.is_open)
+        self.assertGreater(self.fundraiser.version, version)
+        invalidate.assert_called_once_with()
+        publish.assert_called_once_with([self.fundraiser.pk])
+
+    def test_saving_stale_instance_keeps_totals(self):
+        stale = Fundraiser.objects.get(pk=self.fundraiser.pk)
+        self.fundraiser.apply_pledge(30)
+
+        stale.title = "Edited"
+        stale.save()
+        serializer = FundraiserDetailSerializer(stale, data={"description": "Edited too"}, partial=True)
+        self.assertTrue(serializer.is_valid())
+        serializer.save()
+
+        self.fundraiser.refresh_from_db()
+        self.assertEqual((self.fundraiser.title, self.fundraiser.description), ("Edited", "Edited too"))
+        self.assertEqual((self.fundraiser.total_pledged, self.fundraiser.pledge_count), (30, 1))
+
+    def test_list_does_not_aggregate_pledges(self):
+        for _ in range(3):
+            Pledge.objects.create(amount=1, fundraiser=self.fundraiser, supporter=self.supporter)
+
+        with self.assertNumQueries(1):
+            Fundraiser.objects.get(pk=self.fundraiser.pk).is_accepting_pledges()
+
+
+class PledgeAdmissionTests(FundraiserTestMixin, TestCase):
+    def setUp(self):
+        caches["throttles"].clear()
+        self.owner = self.make_user("owner")
+        self.supporter = self.make_user("supporter")
+        self.fundraiser = self.make_fundraiser(self.owner, goal=100)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.supporter).key}")
+
+    def test_admitted_pledge_uses_fixed_number_of_statements(self):
+        # Savepoint, UPDATE totals, INSERT pledge, first-pledge check,
+        # upsert hourly and daily stats, release.
+        with self.assertNumQueries(7):
+            admit_pledge(self.supporter, self.fundraiser, amount=10)
+
+    def test_pledge_that_reaches_goal_closes_fundraiser(self):
+        admit_pledge(self.supporter, self.fundraiser, amount=100)
+
+        self.fundraiser.refresh_from_db()
+        self.assertEqual(self.fundraiser.total_pledged, 100)
+        self.assertFalse(self.fundraiser.is_open)
+
+    def test_rejects_pledge_over_remaining_amount(self):
+        admit_pledge(self.supporter, self.fundraiser, amount=90)
+
+        with self.assertRaisesMessage(PledgeRejected, "only needs the remaining target amount"):
+            admit_pledge(self.supporter, self.fundraiser, amount=20)
+        self.assertEqual(Pledge.objects.count(), 1)
+
+    def test_rejects_pledge_after_deadline_and_closes(self):
+        Fundraiser.objects.filter(pk=self.fundraiser.pk).update(deadline=timezone.now() - timedelta(hours=1))
+
+        with self.assertRaisesMessage(PledgeRejected, "reached its deadline"):
+            admit_pledge(self.supporter, self.fundraiser, amount=10)
+        self.fundraiser.refresh_from_db()
+        self.assertFalse(self.fundraiser.is_open)
+
+    def test_rejects_owner_pledge(self):
+        with self.assertRaises(PledgeRejected):
+            admit_pledge(self.owner, self.fundraiser, amount=10)
+
+    def test_post_pledge_endpoint(self):
+        response = self.client.post("/pledges/", {"amount": 25, "fundraiser": self.fundraiser.pk}, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["supporter"], self.supporter.pk)
+        self.fundraiser.refresh_from_db()
+        self.assertEqual(self.fundraiser.total_pledged, 25)
+
+        response = self.client.post("/pledges/", {"amount": 80, "fundraiser": self.fundraiser.pk}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+
+class PledgeAdmissionConcurrencyTests(FundraiserTestMixin, TransactionTestCase):
+    def test_parallel_pledges_never_overfund(self):
+        owner = self.make_user("owner")
+        supporters = [self.make_user(f"supporter{i}") for i in range(8)]
+        fundraiser = self.make_fundraiser(owner, goal=500)
+        barrier = threading.Barrier(len(supporters))
+        admitted = []
+
+        def pledge_repeatedly(supporter):
+            barrier.wait()
+            try:
+                for _ in range(25):
+                    try:
+                        admit_pledge(supporter, fundraiser, amount=7)
+                        admitted.append(7)
+                    except (PledgeRejected, OperationalError):
+                        pass
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=pledge_repeatedly, args=(s,)) for s in supporters]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        fundraiser.refresh_from_db()
+        pledged = Pledge.objects.filter(fundraiser=fundraiser).aggregate(total=Sum("amount"))["total"]
+        self.assertLessEqual(fundraiser.total_pledged, fundraiser.goal)
+        self.assertEqual(fundraiser.total_pledged, pledged)
+        self.assertEqual(fundraiser.total_pledged, sum(admitted))
+        self.assertEqual(fundraiser.pledge_count, len(admitted))
+        self.assertGreater(len(admitted), 0)
+
+
+class FundraiserQueryCountTests(FundraiserTestMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        supporters = [self.make_user(f"supporter{i}") for i in range(3)]
+        for i in range(4):
+            fundraiser = self.make_fundraiser(self.make_user(f"owner{i}"), goal=1000)
+            for supporter in supporters:
+                Pledge.objects.create(amount=5, fundraiser=fundraiser, supporter=supporter)
+        self.fundraiser = fundraiser
+
+    def test_list_query_count_is_constant(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/fundraisers/")
+        self.assertEqual(len(response.data), 4)
+        self.assertEqual(response.data[0]["owner_username"], "owner0")
+        self.assertEqual(response.data[0]["total_pledged"], 15)
+
+    def test_detail_query_count_is_constant(self):
+        # ETag lookup, fundraiser + owner, pledges + supporters.
+        with self.assertNumQueries(3):
+            response = self.client.get(f"/fundraisers/{self.fundraiser.pk}/")
+        self.assertEqual(len(response.data["pledges"]), 3)
+        self.assertEqual(response.data["pledges"][0]["supporter_username"], "supporter0")
+
+    def test_pledge_list_query_count_is_constant(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/pledges/")
+        self.assertEqual(len(response.data), 12)
+
+
+class KeysetPaginationTests(FundraiserTestMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        owner = self.make_user("owner")
+        self.fundraisers = [self.make_fundraiser(owner, title=f"Fundraiser {i}") for i in range(5)]
+        # Identical timestamps force the id tie-breaker.
+        Fundraiser.objects.filter(pk__in=[f.pk for f in self.fundraisers[1:3]]).update(
+            date_created=self.fundraisers[1].date_created
+        )
+
+    def titles(self, response):
+        return [row["title"] for row in response.data["results"]]
+
+    def test_unpaginated_by_default(self):
+        response = self.client.get("/fundraisers/")
+        self.assertIsInstance(response.data, list)
+
+    def test_walks_forward_and_back(self):
+        first = self.client.get("/fundraisers/", {"page_size": 2})
+        self.assertEqual(self.titles(first), ["Fundraiser 4", "Fundraiser 3"])
+        self.assertIsNone(first.data["previous"])
+
+        second = self.client.get(first.data["next"])
+        self.assertEqual(self.titles(second), ["Fundraiser 2", "Fundraiser 1"])
+
+        third = self.client.get(second.data["next"])
+        self.assertEqual(self.titles(third), ["Fundraiser 0"])
+        self.assertIsNone(third.data["next"])
+
+        back = self.client.get(third.data["previous"])
+        self.assertEqual(self.titles(back), ["Fundraiser 2", "Fundraiser 1"])
+        self.assertIsNotNone(back.data["next"])
+
+    def test_page_size_is_capped(self):
+        with mock.patch.object(KeysetPagination, "max_page_size", 3):
+            response = self.client.get("/fundraisers/", {"page_size": 10_000})
+        self.assertEqual(len(response.data["results"]), 3)
+        self.assertIsNotNone(response.data["next"])
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/fundraisers/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_page_query_does_not_use_offset(self):
+        first = self.client.get("/fundraisers/", {"page_size": 2})
+        with self.assertNumQueries(1) as queries:
+            self.client.get(first.data["next"])
+        self.assertNotIn("OFFSET", queries.captured_queries[0]["sql"])
+
+
+class CommentTreeTests(FundraiserTestMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        author = self.make_user("author")
+        self.fundraiser = self.make_fundraiser(self.make_user("owner"))
+        other = self.make_fundraiser(author)
+        Comment.objects.create(fundraiser=other, author=author, content="elsewhere")
+
+        self.root = Comment.objects.create(fundraiser=self.fundraiser, author=author, content="root")
+        parent = self.root
+        for level in range(1, 4):
+            parent = Comment.objects.create(fundraiser=self.fundraiser, author=author, parent=parent, content=f"level {level}")
+        Comment.objects.create(fundraiser=self.fundraiser, author=author, content="second root")
+
+    def test_tree_is_loaded_in_one_query(self):
+        # ETag lookup, then the comments.
+        with self.assertNumQueries(2):
+            response = self.client.get("/comments/", {"fundraiser": self.fundraiser.pk, "tree": "true"})
+
+        self.assertEqual([c["content"] for c in response.data], ["root", "second root"])
+        node = response.data[0]
+        for level in range(1, 4):
+            node = node["replies"][0]
+            self.assertEqual(node["content"], f"level {level}")
+            self.assertEqual(node["author_username"], "author")
+        self.assertEqual(node["replies"], [])
+
+    def test_depth_limit(self):
+        response = self.client.get("/comments/", {"fundraiser": self.fundraiser.pk, "tree": "true", "depth": 2})
+
+        level_one = response.data[0]["replies"][0]
+        self.assertEqual(level_one["content"], "level 1")
+        self.assertEqual(level_one["replies"], [])
+
+    def test_page_limit(self):
+        response = self.client.get(
+            "/comments/", {"fundraiser": self.fundraiser.pk, "tree": "true", "limit": 1, "offset": 1}
+        )
+        self.assertEqual([c["content"] for c in response.data], ["second root"])
+
+    def test_out_of_range_values_are_clamped(self):
+        params = {"fundraiser": self.fundraiser.pk, "tree": "true"}
+        response = self.client.get("/comments/", {**params, "offset": -5, "limit": 0, "depth": -1})
+        self.assertEqual([c["content"] for c in response.data], ["root"])
+        self.assertEqual(response.data[0]["replies"], [])
+        response = self.client.get("/comments/", {**params, "limit": 10**6})
+        self.assertEqual(len(response.data), 2)
+
+    async def test_malformed_values_are_rejected(self):
+        params = {"fundraiser": self.fundraiser.pk, "tree": "true"}
+        for bad in ({"limit": "x"}, {"offset": "1.5"}, {"depth": "x"}):
+            for path in ("/comments/", "/async/comments/"):
+                response = await AsyncClient().get(path, {**params, **bad})
+                self.assertEqual(response.status_code, 400, (path, bad))
+
+
+class SearchTests(FundraiserTestMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        owner = self.make_user("owner")
+        self.make_fundraiser(owner, title="Winter beds", description="Warm beds for the cold months")
+        self.make_fundraiser(owner, title="Food bank", description="Meals and a few beds")
+        self.make_fundraiser(owner, title="Showers", description="Mobile showers")
+
+    def titles(self, response):
+        return [row["title"] for row in response.data]
+
+    def test_fundraiser_search_is_ranked(self):
+        response = self.client.get("/fundraisers/", {"search": "beds"})
+        self.assertEqual(self.titles(response), ["Winter beds", "Food bank"])
+
+    def test_prefix_match(self):
+        response = self.client.get("/fundraisers/", {"search": "show"})
+        self.assertEqual(self.titles(response), ["Showers"])
+
+    def test_index_follows_edits_and_deletes(self):
+        fundraiser = Fundraiser.objects.get(title="Showers")
+        fundraiser.description = "Hot water and soap"
+        fundraiser.save()
+        self.assertEqual(self.titles(self.client.get("/fundraisers/", {"search": "soap"})), ["Showers"])
+
+        fundraiser.delete()
+        self.assertEqual(self.titles(self.client.get("/fundraisers/", {"search": "soap"})), [])
+
+    def test_query_syntax_is_not_interpreted(self):
+        response = self.client.get("/fundraisers/", {"search": 'beds" OR NOT "x'})
+        self.assertEqual(response.status_code, 200)
+
+    @skipUnless(connection.vendor == "postgresql", "tsquery prefix matching is PostgreSQL-only")
+    def test_postgres_query_matches_prefixes_of_every_term(self):
+        self.assertEqual(self.titles(self.client.get("/fundraisers/", {"search": "win bed"})), ["Winter beds"])
+        self.assertEqual(self.titles(self.client.get("/fundraisers/", {"search": "mea"})), ["Food bank"])
+        self.assertEqual(self.titles(self.client.get("/fundraisers/", {"search": "'&!:*"})), [])
+
+    def test_comment_and_pledge_search(self):
+        fundraiser = Fundraiser.objects.get(title="Showers")
+        supporter = self.make_user("supporter")
+        Pledge.objects.create(amount=5, fundraiser=fundraiser, supporter=supporter, comment="For towels")
+        Comment.objects.create(fundraiser=fundraiser, author=supporter, content="Towels please")
+
+        self.assertEqual(len(self.client.get("/pledges/", {"search": "towel"}).data), 1)
+        self.assertEqual(len(self.client.get("/comments/", {"search": "towel"}).data), 1)
+
+
+class ListQueryPlanTests(FundraiserTestMixin, TestCase):
+    """Every filtered list query should be answered from an index, not a table scan."""
+
+    shapes = [
+        ("/fundraisers/", {"is_open": "true"}),
+        ("/fundraisers/", {"is_open": "true", "goal_lte": 500}),
+        ("/fundraisers/", {"goal_gte": 10, "goal_lte": 500}),
+        ("/fundraisers/", {"owner": 1}),
+        ("/fundraisers/", {"has_deadline": "false"}),
+        ("/fundraisers/", {"page_size": 10}),
+        ("/pledges/", {"fundraiser": 1}),
+        ("/pledges/", {"fundraiser": 1, "anonymous": "true", "amount_lte": 50}),
+        ("/pledges/", {"supporter": 1}),
+        ("/comments/", {"fundraiser": 1}),
+        ("/comments/", {"fundraiser": 1, "tree": "true"}),
+        ("/comments/", {"author": 1}),
+        ("/fundraisers/rankings/most-funded/", {}),
+        ("/fundraisers/rankings/closest-to-goal/", {}),
+        ("/fundraisers/rankings/ending-soon/", {}),
+        ("/fundraisers/rankings/trending/", {}),
+    ]
+
+    def setUp(self):
+        self.client = APIClient()
+        owner = self.make_user("owner")
+        fundraiser = self.make_fundraiser(owner)
+        Pledge.objects.create(amount=5, fundraiser=fundraiser, supporter=self.make_user("supporter"))
+        Comment.objects.create(fundraiser=fundraiser, author=owner, content="Thanks")
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute("SET LOCAL enable_seqscan = off")
+                cursor.execute("EXPLAIN " + sql)
+            else:
+                cursor.execute("EXPLAIN QUERY PLAN " + sql)
+            return "\n".join(str(row[-1]) for row in cursor.fetchall())
+
+    def test_list_queries_use_indexes(self):
+        # "SCAN x USING INDEX" walks an index in order and is fine; a bare
+        # "SCAN x" reads the whole table.
+        table_scan = re.compile(r"Seq Scan on fundraisers_|^SCAN fundraisers_\w+$", re.MULTILINE)
+        for path, params in self.shapes:
+            with self.subTest(path=path, params=params):
+                with CaptureQueriesContext(connection) as queries:
+                    self.assertEqual(self.client.get(path, params).status_code, 200)
+                for query in queries.captured_queries:
+                    plan = self.explain(query["sql"])
+                    self.assertIsNone(table_scan.search(plan), f"{query['sql']}\n{plan}")
+
+
+class ResponseCacheTests(FundraiserTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.owner = self.make_user("owner")
+        self.fundraiser = self.make_fundraiser(self.owner)
+
+    def test_anonymous_reads_are_served_from_cache(self):
+        first = self.client.get("/fundraisers/", {"is_open": "true", "goal_gte": 1})
+        self.assertEqual(first["X-Cache"], "MISS")
+
+        # Same parameters in a different order hit the same entry.
+        with self.assertNumQueries(0):
+            second = self.client.get("/fundraisers/?goal_gte=1&is_open=true")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(response_cache.stats()["hits"], 1)
+        self.assertEqual(response_cache.stats()["misses"], 1)
+
+    def test_writes_invalidate_cached_responses(self):
+        self.client.get(f"/fundraisers/{self.fundraiser.pk}/")
+        Pledge.objects.create(amount=10, fundraiser=self.fundraiser, supporter=self.make_user("supporter"))
+
+        response = self.client.get(f"/fundraisers/{self.fundraiser.pk}/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["total_pledged"], 10)
+
+    def test_evicted_version_does_not_revive_old_entries(self):
+        path = f"/fundraisers/{self.fundraiser.pk}/"
+        self.client.get(path)
+        Pledge.objects.create(amount=10, fundraiser=self.fundraiser, supporter=self.make_user("supporter"))
+        self.client.get(path)
+        cache.delete(response_cache.VERSION_KEY)  # Culled, say.
+
+        response = self.client.get(path)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["total_pledged"], 10)
+
+    def test_deploy_check_wants_a_shared_cache(self):
+        self.assertEqual([error.id for error in response_cache.check_shared_cache()], ["crowdfunding.W002"])
+        with override_settings(RESPONSE_CACHE={**settings.RESPONSE_CACHE, "TIMEOUT": 0}):
+            self.assertEqual(response_cache.check_shared_cache(), [])
+
+    def test_authenticated_requests_bypass_cache(self):
+        self.client.force_authenticate(self.owner)
+        self.client.get("/pledges/")
+        response = self.client.get("/pledges/")
+        self.assertNotIn("X-Cache", response)
+
+    def test_stats_endpoint_is_admin_only(self):
+        self.assertEqual(self.client.get("/cache-stats/").status_code, 401)
+        admin = get_user_model().objects.create_superuser(username="admin")
+        self.client.force_authenticate(admin)
+        self.assertIn("hit_rate", self.client.get("/cache-stats/").data)
+
+
+class ConditionalGetTests(FundraiserTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.fundraiser = self.make_fundraiser(self.make_user("owner"))
+        self.url = f"/fundraisers/{self.fundraiser.pk}/"
+
+    def test_matching_etag_returns_304_without_serializing(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(self.url)["Last-Modified"]
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_pledges_and_comments_change_the_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        supporter = self.make_user("supporter")
+
+        Pledge.objects.create(amount=5, fundraiser=self.fundraiser, supporter=supporter)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total_pledged"], 5)
+
+        etag = response["ETag"]
+        Comment.objects.create(fundraiser=self.fundraiser, author=supporter, content="Good luck")
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_clock_dependent_fields_change_the_validators(self):
+        start = timezone.now()
+        Fundraiser.objects.filter(pk=self.fundraiser.pk).update(deadline=start + timedelta(days=2, hours=1))
+        first = self.client.get(self.url)
+        self.assertEqual((first.data["days_left"], first.data["computed_is_open"]), (2, True))
+
+        def get_at(later, **headers):
+            with mock.patch("django.utils.timezone.now", return_value=start + later):
+                return self.client.get(self.url, **headers)
+
+        conditional = {"HTTP_IF_NONE_MATCH": first["ETag"], "HTTP_IF_MODIFIED_SINCE": first["Last-Modified"]}
+        self.assertEqual(get_at(timedelta(minutes=30), **conditional).status_code, 304)
+        # Past a day boundary, then past the deadline.
+        for later, days_left, is_open in ((timedelta(hours=2), 1, True), (timedelta(days=2, hours=2), 0, False)):
+            response = get_at(later, **conditional)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual((response.data["days_left"], response.data["computed_is_open"]), (days_left, is_open))
+            self.assertEqual(get_at(later, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]).status_code, 200)
+
+    def test_stale_saves_get_distinct_versions(self):
+        first = Fundraiser.objects.get(pk=self.fundraiser.pk)
+        second = Fundraiser.objects.get(pk=self.fundraiser.pk)
+        first.title = "First edit"
+        first.save()
+        etag = self.client.get(self.url)["ETag"]
+
+        second.title = "Second edit"
+        second.save()
+        self.assertEqual((first.version, second.version), (self.fundraiser.version + 1, self.fundraiser.version + 2))
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["title"], "Second edit")
+
+    def test_comment_list_for_a_fundraiser(self):
+        params = {"fundraiser": self.fundraiser.pk, "tree": "true"}
+        etag = self.client.get("/comments/", params)["ETag"]
+        self.assertEqual(self.client.get("/comments/", params, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # A different query string is a different representation.
+        self.assertEqual(
+            self.client.get("/comments/", {"fundraiser": self.fundraiser.pk}, HTTP_IF_NONE_MATCH=etag).status_code,
+            200,
+        )
+
+    async def test_malformed_fundraiser_id_is_400(self):
+        for path in ("/comments/", "/async/comments/"):
+            for params in ({"fundraiser": "abc"}, {"fundraiser": "abc", "tree": "true"}):
+                response = await AsyncClient().get(path, params)
+                self.assertEqual(response.status_code, 400, (path, params))
+                self.assertNotIn("ETag", response)
+
+    def test_missing_fundraiser_is_still_404(self):
+        self.assertEqual(self.client.get("/fundraisers/999/").status_code, 404)
+
+
+class DeadlineSchedulerTests(FundraiserTestMixin, TestCase):
+    def setUp(self):
+        owner = self.make_user("owner")
+        now = timezone.now()
+        self.expired = [self.make_fundraiser(owner, deadline=now - timedelta(minutes=i + 1)) for i in range(3)]
+        self.upcoming = self.make_fundraiser(owner, deadline=now + timedelta(minutes=5))
+        self.no_deadline = self.make_fundraiser(owner)
+
+    def test_closes_expired_fundraisers_in_one_update(self):
+        with self.assertNumQueries(1):
+            closed = Fundraiser.objects.expired().touch(is_open=False)
+        self.assertEqual(closed, 3)
+        self.assertEqual(
+            set(Fundraiser.objects.filter(is_open=True).values_list("pk", flat=True)),
+            {self.upcoming.pk, self.no_deadline.pk},
+        )
+
+    def test_command_closes_and_bumps_version(self):
+        call_command("close_expired_fundraisers", stdout=StringIO())
+
+        fundraiser = Fundraiser.objects.get(pk=self.expired[0].pk)
+        self.assertFalse(fundraiser.is_open)
+        self.assertEqual(fundraiser.version, self.expired[0].version + 1)
+        self.assertEqual(Fundraiser.objects.filter(is_open=False).count(), 3)
+
+    def test_loop_sleeps_until_next_deadline(self):
+        call_command("close_expired_fundraisers", stdout=StringIO())
+        wait = CloseExpiredCommand().seconds_until_next_deadline(max_sleep=3600)
+        self.assertTrue(290 < wait <= 300)
+        self.assertEqual(CloseExpiredCommand().seconds_until_next_deadline(max_sleep=60), 60)
+
+
+class RankingTests(FundraiserTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        owner = self.make_user("owner")
+        self.supporter = self.make_user("supporter")
+        now = timezone.now()
+        self.big = self.make_fundraiser(owner, goal=1000, title="Big", deadline=now + timedelta(days=30))
+        self.nearly = self.make_fundraiser(owner, goal=100, title="Nearly", deadline=now + timedelta(days=2))
+        self.quiet = self.make_fundraiser(owner, goal=500, title="Quiet")
+        admit_pledge(self.supporter, self.big, amount=400)
+        admit_pledge(self.supporter, self.nearly, amount=90)
+        admit_pledge(self.supporter, self.quiet, amount=50)
+
+    def titles(self, kind, **params):
+        response = self.client.get(f"/fundraisers/rankings/{kind}/", params)
+        self.assertEqual(response.status_code, 200)
+        return [row["title"] for row in response.data]
+
+    def test_most_funded(self):
+        self.assertEqual(self.titles("most-funded"), ["Big", "Nearly", "Quiet"])
+
+    def test_closest_to_goal(self):
+        self.assertEqual(self.titles("closest-to-goal"), ["Nearly", "Quiet", "Big"])
+
+    def test_ending_soon(self):
+        self.assertEqual(self.titles("ending-soon"), ["Nearly", "Big"])
+
+    def test_trending_only_counts_recent_hours(self):
+        HourlyPledgeStat.objects.filter(fundraiser=self.big).update(hour=timezone.now() - timedelta(hours=30))
+        response = self.client.get("/fundraisers/rankings/trending/", {"hours": 24})
+        self.assertEqual([(row["title"], row["recent_pledged"]) for row in response.data], [("Nearly", 90), ("Quiet", 50)])
+
+    def test_hourly_stats_follow_pledges(self):
+        stat = HourlyPledgeStat.objects.get(fundraiser=self.quiet)
+        self.assertEqual((stat.amount, stat.pledge_count), (50, 1))
+        Pledge.objects.create(amount=25, fundraiser=self.quiet, supporter=self.supporter)
+        stat.refresh_from_db()
+        self.assertEqual((stat.amount, stat.pledge_count), (75, 2))
+
+        Pledge.objects.filter(fundraiser=self.quiet).first().delete()
+        stat.refresh_from_db()
+        self.assertEqual((stat.amount, stat.pledge_count), (25, 1))
+
+    def test_limit_and_unknown_kind(self):
+        self.assertEqual(self.titles("most-funded", limit=1), ["Big"])
+        self.assertEqual(self.client.get("/fundraisers/rankings/nope/").status_code, 404)
+        for params in ({"limit": "x"}, {"hours": "x"}, {"hours": "1.5"}):
+            self.assertEqual(self.client.get("/fundraisers/rankings/trending/", params).status_code, 400)
+
+    def test_trending_skips_fundraisers_deleted_meanwhile(self):
+        remaining = Fundraiser.objects.exclude(pk=self.quiet.pk)
+        with mock.patch.object(Fundraiser.objects, "for_list", return_value=remaining):
+            self.assertEqual(self.titles("trending"), ["Big", "Nearly"])
+
+    def test_fundraiser_delete_cascades_cleanly(self):
+        self.big.delete()
+        self.assertFalse(HourlyPledgeStat.objects.filter(fundraiser_id=self.big.pk).exists())
+
+
+class AnalyticsTests(FundraiserTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        owner = self.make_user("owner")
+        self.alice = self.make_user("alice")
+        self.bob = self.make_user("bob")
+        self.fundraiser = self.make_fundraiser(owner, goal=10_000)
+        self.day = timezone.localtime().replace(hour=12, minute=0, second=0, microsecond=0) - timedelta(days=3)
+        for days, supporter, amount in [(0, self.alice, 10), (0, self.bob, 20), (1, self.alice, 5), (2, self.bob, 40)]:
+            self.pledge(self.day + timedelta(days=days), supporter, amount)
+
+    def pledge(self, when, supporter, amount):
+        with mock.patch("django.utils.timezone.now", return_value=when):
+            return Pledge.objects.create(amount=amount, fundraiser=self.fundraiser, supporter=supporter)
+
+    def series(self, **params):
+        response = self.client.get(f"/fundraisers/{self.fundraiser.pk}/analytics/", params)
+        self.assertEqual(response.status_code, 200)
+        return [
+            (row["amount"], row["pledge_count"], row["new_supporters"], row["cumulative_amount"], row["cumulative_supporters"])
+            for row in response.data["buckets"]
+        ]
+
+    def test_daily_buckets_and_running_totals(self):
+        self.assertEqual(self.series(), [(30, 2, 2, 30, 2), (5, 1, 0, 35, 2), (40, 1, 0, 75, 2)])
+
+    def test_range_keeps_cumulative_baseline(self):
+        start = (self.day + timedelta(days=1)).date().isoformat()
+        self.assertEqual(self.series(start=start, end=start), [(5, 1, 0, 35, 2)])
+
+    def test_hourly_interval(self):
+        self.pledge(self.day + timedelta(minutes=30), self.alice, 1)
+        rows = self.series(interval="hour", end=(self.day + timedelta(hours=1)).isoformat())
+        self.assertEqual(rows, [(31, 3, 2, 31, 2)])
+
+    def test_bad_parameters(self):
+        url = f"/fundraisers/{self.fundraiser.pk}/analytics/"
+        self.assertEqual(self.client.get(url, {"interval": "week"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"start": "yesterday"}).status_code, 400)
+        self.assertEqual(self.client.get("/fundraisers/999/analytics/").status_code, 404)
+
+    def test_query_count_does_not_grow_with_range(self):
+        for days in range(3, 20):
+            self.pledge(self.day + timedelta(days=days), self.alice, 1)
+        cache.clear()
+        url = f"/fundraisers/{self.fundraiser.pk}/analytics/"
+        # Existence check, baseline aggregate, buckets.
+        with self.assertNumQueries(3):
+            self.client.get(url, {"start": self.day.date().isoformat()})
+
+    def test_edited_amount_moves_the_original_buckets(self):
+        pledge = Pledge.objects.get(fundraiser=self.fundraiser, amount=5)
+        pledge.amount = 8
+        pledge.save()
+        # Without Pledge.save's lookup the pre_save handler loads the old amount.
+        other = Pledge.objects.get(fundraiser=self.fundraiser, amount=40)
+        other.amount = 45
+        other.save(update_totals=False)
+
+        self.assertEqual(self.series(), [(30, 2, 2, 30, 2), (8, 1, 0, 38, 2), (45, 1, 0, 83, 2)])
+        self.assertEqual(
+            HourlyPledgeStat.objects.get(fundraiser=self.fundraiser, hour=pledge.date_created.replace(minute=0)).amount, 8,
+        )
+
+    def test_rebuild_repairs_drift(self):
+        DailyPledgeStat.objects.filter(fundraiser=self.fundraiser).update(amount=0, new_supporters=0)
+        HourlyPledgeStat.objects.filter(fundraiser=self.fundraiser).delete()
+        call_command("rebuild_pledge_rollups", str(self.fundraiser.pk), stdout=StringIO())
+
+        self.assertEqual(self.series(), [(30, 2, 2, 30, 2), (5, 1, 0, 35, 2), (40, 1, 0, 75, 2)])
+        self.assertEqual(HourlyPledgeStat.objects.filter(fundraiser=self.fundraiser).count(), 3)
+
+
+class BulkImportTests(FundraiserTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = self.make_user("owner")
+        self.supporter = self.make_user("supporter")
+        self.fundraiser = self.make_fundraiser(self.owner, goal=100)
+        self.other = self.make_fundraiser(self.owner, goal=1000)
+        self.pledges_csv = [
+            "fundraiser,supporter,amount,anonymous,comment,date_created\n",
+            f"{self.fundraiser.pk},{self.supporter.pk},60,false,,2024-03-01T10:15:00Z\n",
+            f"{self.fundraiser.pk},{self.supporter.pk},50,true,second,2024-03-02T09:00:00Z\n",
+            f"{self.other.pk},{self.supporter.pk},-5,false,,\n",
+            f"999,{self.supporter.pk},5,false,,\n",
+            f"{self.other.pk},{self.supporter.pk},25,false,,\n",
+        ]
+
+    def test_pledges_update_totals_status_and_rollups_once(self):
+        # Validation queries per chunk don't grow with the number of rows.
+        with CaptureQueriesContext(connection) as queries:
+            report = import_rows("pledges", read_rows(self.pledges_csv, "csv"), batch_size=2)
+        self.assertLess(len(queries), 40)
+        self.assertEqual((report["created"], report["rejected"], report["fundraisers"]), (3, 2, 2))
+        self.assertEqual([error["row"] for error in report["errors"]], [3, 4])
+        self.assertEqual(report["errors"][0]["errors"], {"amount": ["Must be greater than zero."]})
+
+        self.fundraiser.refresh_from_db()
+        self.assertEqual((self.fundraiser.total_pledged, self.fundraiser.pledge_count, self.fundraiser.is_open), (110, 2, False))
+        self.other.refresh_from_db()
+        self.assertEqual((self.other.total_pledged, self.other.is_open), (25, True))
+
+        first = Pledge.objects.get(fundraiser=self.fundraiser, amount=60)
+        self.assertEqual(first.date_created.isoformat(), "2024-03-01T10:15:00+00:00")
+        self.assertEqual(
+            list(DailyPledgeStat.objects.filter(fundraiser=self.fundraiser).values_list("amount", "new_supporters")),
+            [(60, 1), (50, 0)],
+        )
+        self.assertEqual([p.amount for p in Pledge.objects.filter(fundraiser=self.fundraiser, comment="second")], [50])
+
+    def test_pledges_saved_during_an_import_get_a_timestamp(self):
+        bulk_create = Pledge.objects.bulk_create
+
+        def save_one_meanwhile(*args, **kwargs):
+            # A request saving a pledge in another thread mid-import.
+            Pledge.objects.create(amount=1, fundraiser=self.other, supporter=self.supporter)
+            return bulk_create(*args, **kwargs)
+
+        with mock.patch.object(Pledge.objects, "bulk_create", side_effect=save_one_meanwhile):
+            import_rows("pledges", read_rows(self.pledges_csv, "csv"))
+        self.assertIsNotNone(Pledge.objects.get(fundraiser=self.other, amount=1).date_created)
+        self.assertEqual(
+            Pledge.objects.get(fundraiser=self.fundraiser, amount=60).date_created.isoformat(), "2024-03-01T10:15:00+00:00",
+        )
+
+    def test_jsonl_fundraisers_and_dry_run(self):
+        lines = [
+            json.dumps({"title": "Imported", "description": "From a partner", "goal": 500,
+                        "image": "https://example.com/a.png", "owner": self.owner.pk}) + "\n",
+            "not json\n",
+            json.dumps({"title": "No goal", "description": "x", "image": "https://example.com/a.png", "owner": self.owner.pk}) + "\n",
+        ]
+        report = import_rows("fundraisers", read_rows(lines, "jsonl"), dry_run=True)
+        self.assertEqual((report["created"], report["rejected"]), (1, 2))
+        self.assertFalse(Fundraiser.objects.filter(title="Imported").exists())
+
+        import_rows("fundraisers", read_rows(lines, "jsonl"))
+        self.assertEqual(Fundraiser.objects.get(title="Imported").owner, self.owner)
+
+    def test_import_api_is_admin_only(self):
+        client = APIClient()
+        upload = SimpleUploadedFile("pledges.csv", "".join(self.pledges_csv).encode())
+        self.assertEqual(client.post("/imports/pledges/", {"file": upload}).status_code, 401)
+
+        admin = get_user_model().objects.create_superuser(username="admin")
+        client.force_authenticate(admin)
+        upload.seek(0)
+        response = client.post("/imports/pledges/", {"file": upload})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["created"], 3)
+        self.assertIn("rows_per_second", response.data)
+        self.assertEqual(client.post("/imports/comments/", {"file": upload}).status_code, 404)
+
+    def test_command_reports_throughput(self):
+        path = os.path.join(self.enterContext(tempfile.TemporaryDirectory()), "pledges.csv")
+        with open(path, "w") as handle:
+            handle.writelines(self.pledges_csv)
+        out = StringIO()
+        call_command("import_records", "pledges", path, stdout=out, stderr=StringIO())
+        self.assertIn("Imported 3 pledges (2 rejected, 2 fundraisers updated)", out.getvalue())
+        self.assertIn("rows/s", out.getvalue())
+
+
+class ExportTests(FundraiserTestMixin, TestCase):
+    def setUp(self):
+        owner = self.make_user("owner")
+        self.supporter = self.make_user("supporter")
+        self.fundraiser = self.make_fundraiser(owner, goal=1000, title="Beds, blankets")
+        self.other = self.make_fundraiser(owner, goal=1000)
+        admit_pledge(self.supporter, self.fundraiser, amount=10, comment='Say "hi"')
+        admit_pledge(self.supporter, self.fundraiser, amount=20, anonymous=True)
+        admit_pledge(self.make_user("carol"), self.other, amount=30)
+        Pledge.objects.filter(amount=10).update(date_created=timezone.now() - timedelta(days=10))
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_superuser(username="admin"))
+
+    def export(self, kind, **params):
+        response = self.client.get(f"/exports/{kind}/", params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_pledges_csv_with_filters(self):
+        rows = list(csv.DictReader(StringIO(self.export("pledges", fundraiser=self.fundraiser.pk))))
+        self.assertEqual([(row["amount"], row["supporter_username"], row["comment"]) for row in rows],
+                         [("10", "supporter", 'Say "hi"'), ("20", "supporter", "")])
+
+        since = (timezone.now() - timedelta(days=1)).date().isoformat()
+        rows = list(csv.DictReader(StringIO(self.export("pledges", date_from=since, anonymous="false"))))
+        self.assertEqual([row["amount"] for row in rows], ["30"])
+
+    def test_fundraisers_jsonl(self):
+        rows = [json.loads(line) for line in self.export("fundraisers", file_format="jsonl").splitlines()]
+        self.assertEqual([(row["title"], row["total_pledged"]) for row in rows], [("Beds, blankets", 30), ("Warm beds", 30)])
+
+    def test_single_query_regardless_of_rows(self):
+        with self.assertNumQueries(1):
+            self.export("pledges")
+
+    def test_bad_parameters_and_permissions(self):
+        self.assertEqual(self.client.get("/exports/pledges/", {"file_format": "xml"}).status_code, 400)
+        self.assertEqual(self.client.get("/exports/pledges/", {"date_from": "soon"}).status_code, 400)
+        self.assertEqual(APIClient().get("/exports/pledges/").status_code, 401)
+
+    def test_command(self):
+        out = StringIO()
+        call_command("export_records", "pledges", "--supporter", str(self.supporter.pk), "--format", "jsonl", stdout=out)
+        self.assertEqual([json.loads(line)["amount"] for line in out.getvalue().splitlines()], [10, 20])
+
+
+class FastListSerializerTests(FundraiserTestMixin, TestCase):
+    """The values() fast path must render exactly what the DRF serializers do."""
+
+    def setUp(self):
+        owner = self.make_user("owner")
+        supporter = self.make_user("supporter")
+        now = timezone.now()
+        funded = self.make_fundraiser(owner, goal=50, title="Funded beds")
+        expired = self.make_fundraiser(owner, goal=500, title="Expired", deadline=now + timedelta(days=1))
+        self.make_fundraiser(owner, goal=0, title="No goal", deadline=now + timedelta(days=3))
+        admit_pledge(supporter, funded, amount=50, comment="Warm beds", anonymous=True)
+        admit_pledge(supporter, expired, amount=30)
+        Fundraiser.objects.filter(pk=expired.pk).update(deadline=now - timedelta(hours=1))
+        self.client = APIClient()
+        self.client.force_authenticate(supporter)
+
+    def assertSameContent(self, url, params=None):
+        with override_settings(FAST_LIST_SERIALIZERS=False):
+            slow = self.client.get(url, params)
+        with override_settings(FAST_LIST_SERIALIZERS=True):
+            fast = self.client.get(url, params)
+        self.assertEqual(slow.status_code, 200)
+        self.assertEqual(fast.content, slow.content)
+        return fast
+
+    def test_fundraiser_list(self):
+        self.assertSameContent("/fundraisers/")
+        self.assertSameContent("/fundraisers/", {"search": "beds"})
+        self.assertSameContent("/fundraisers/", {"is_open": "true", "goal_lte": "500"})
+
+    def test_pledge_list(self):
+        self.assertSameContent("/pledges/")
+        self.assertSameContent("/pledges/", {"anonymous": "true"})
+
+    def test_paginated(self):
+        first = self.assertSameContent("/fundraisers/", {"page_size": 2})
+        self.assertSameContent(first.data["next"])
+        self.assertSameContent("/pledges/", {"page_size": 1})
+
+    @override_settings(FAST_LIST_SERIALIZERS=True)
+    def test_single_query(self):
+        with self.assertNumQueries(1):
+            self.client.get("/fundraisers/")
+        with self.assertNumQueries(1):
+            self.client.get("/pledges/")
+
+
+class FastJSONRendererTests(FundraiserTestMixin, TestCase):
+    payload = {
+        "utc": datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+        "offset": datetime(2024, 5, 1, 12, 30, tzinfo=dt_timezone(timedelta(hours=10))),
+        "naive": datetime(2024, 5, 1, 12, 30),
+        "day": date(2024, 5, 1),
+        "amount": Decimal("12.5"),
+        "id": uuid.UUID(int=1),
+        "text": "Warm beds \u2028 for winter \u2014 ñ",
+        1: [True, None, 1.5, {"nested": ()}],
+    }
+
+    def renderer(self, backend):
+        renderer = renderers.FastJSONRenderer()
+        if backend not in renderers.available_backends():
+            self.skipTest(f"{backend} is not installed")
+        renderer.backend, renderer.dumps = backend, renderers.available_backends()[backend]
+        return renderer
+
+    def test_orjson_matches_drf(self):
+        self.assertEqual(self.renderer("orjson").render(self.payload), JSONRenderer().render(self.payload))
+
+    def test_msgspec_matches_drf(self):
+        payload = {key: value for key, value in self.payload.items() if key != "amount"}
+        self.assertEqual(self.renderer("msgspec").render(payload), JSONRenderer().render(payload))
+        self.assertEqual(json.loads(self.renderer("msgspec").render({"amount": Decimal("12.5")})), {"amount": 12.5})
+
+    def test_falls_back_without_fast_backends(self):
+        with mock.patch.object(renderers, "orjson", None), mock.patch.object(renderers, "msgspec", None):
+            renderer = renderers.FastJSONRenderer()
+        self.assertEqual(renderer.backend, "json")
+        self.assertEqual(renderer.render(self.payload), JSONRenderer().render(self.payload))
+
+    def test_falls_back_for_indent_and_unencodable_values(self):
+        renderer = renderers.FastJSONRenderer()
+        self.assertEqual(
+            renderer.render(self.payload, "application/json; indent=2"),
+            JSONRenderer().render(self.payload, "application/json; indent=2"),
+        )
+        self.assertEqual(renderer.render({"big": 2**70}), b'{"big":1180591620717411303424}')
+
+    def test_api_responses_unchanged(self):
+        owner = self.make_user("owner")
+        fundraiser = self.make_fundraiser(owner, deadline=timezone.now() + timedelta(days=3))
+        admit_pledge(self.make_user("supporter"), fundraiser, amount=5)
+        client = APIClient()
+        client.force_authenticate(owner)
+        for url in ["/fundraisers/", f"/fundraisers/{fundraiser.pk}/", "/pledges/"]:
+            response = client.get(url)
+            self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+
+class AsyncViewTests(FundraiserTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        owner = self.make_user("owner")
+        supporter = self.make_user("supporter")
+        self.fundraiser = self.make_fundraiser(owner, goal=500, title="Warm beds", deadline=timezone.now() + timedelta(days=5))
+        self.make_fundraiser(owner, goal=50, title="Blankets")
+        admit_pledge(supporter, self.fundraiser, amount=40, comment="For the beds")
+        root = Comment.objects.create(fundraiser=self.fundraiser, author=supporter, content="Go team")
+        Comment.objects.create(fundraiser=self.fundraiser, author=owner, content="Thanks", parent=root)
+        self.client = APIClient()
+        self.async_client = AsyncClient()
+
+    async def assertSameBody(self, path, params=None):
+        sync = await sync_to_async(self.client.get)(path, params)
+        response = await self.async_client.get(f"/async{path}", params)
+        self.assertEqual(response.status_code, sync.status_code)
+        # Pagination links point back at the async endpoint.
+        self.assertEqual(response.content.replace(b"/async/", b"/"), sync.content)
+        return response
+
+    async def test_bodies_match_sync_views(self):
+        await self.assertSameBody("/fundraisers/")
+        await self.assertSameBody("/fundraisers/", {"goal_lte": "100"})
+        await self.assertSameBody("/fundraisers/", {"search": "beds"})
+        first = await self.assertSameBody("/fundraisers/", {"page_size": 1})
+        cursor = parse_qs(urlparse(json.loads(first.content)["next"]).query)["cursor"][0]
+        await self.assertSameBody("/fundraisers/", {"cursor": cursor, "page_size": 1})
+        await self.assertSameBody("/fundraisers/", {"cursor": "garbage"})
+        await self.assertSameBody(f"/fundraisers/{self.fundraiser.pk}/")
+        await self.assertSameBody("/comments/", {"fundraiser": self.fundraiser.pk})
+        await self.assertSameBody("/comments/", {"fundraiser": self.fundraiser.pk, "tree": "true", "depth": "1"})
+        await self.assertSameBody("/comments/", {"page_size": 1})
+        await self.assertSameBody("/fundraisers/999/")
+
+    async def test_invalid_filters(self):
+        response = await self.async_client.get("/async/fundraisers/", {"goal_lte": "lots"})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_cache_and_conditional_get(self):
+        url = f"/async/fundraisers/{self.fundraiser.pk}/"
+        first = await self.async_client.get(url)
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual((await self.async_client.get(url))["X-Cache"], "HIT")
+
+        response = await self.async_client.get(url, headers={"if-none-match": first["ETag"]})
+        self.assertEqual(response.status_code, 304)
+
+        await sync_to_async(admit_pledge)(await sync_to_async(self.make_user)("late"), self.fundraiser, amount=5)
+        response = await self.async_client.get(url, headers={"if-none-match": first["ETag"]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)["total_pledged"], 45)
+
+
+    def test_asgi_middleware_chain_stays_async(self):
+        adapted = []
+        adapt_method_mode = BaseHandler.adapt_method_mode
+
+        def record(handler, is_async, method, method_is_async=None, debug=False, name=None):
+            if name and is_async != (iscoroutinefunction(method) if method_is_async is None else method_is_async):
+                adapted.append(name)
+            return adapt_method_mode(handler, is_async, method, method_is_async, debug, name)
+
+        with mock.patch.object(BaseHandler, "adapt_method_mode", record):
+            handler = ASGIHandler()
+        self.assertEqual(adapted, [])
+        self.assertTrue(iscoroutinefunction(handler._middleware_chain))
+
+    @override_settings(WHITENOISE_USE_FINDERS=True)
+    async def test_static_files_are_served_in_async_chain(self):
+        async def view(request):
+            return HttpResponse("view")
+
+        middleware = StaticFilesMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = await middleware(AsyncRequestFactory().get("/static/admin/css/base.css"))
+        self.assertEqual((response.status_code, response["Content-Type"]), (200, "text/css; charset=\"utf-8\""))
+        response = await middleware(AsyncRequestFactory().get("/fundraisers/"))
+        self.assertEqual(response.content, b"view")
+
+
+class ProgressEventTests(FundraiserTestMixin, TestCase):
+    def setUp(self):
+        self.owner = self.make_user("owner")
+        self.supporter = self.make_user("supporter")
+        self.fundraiser = self.make_fundraiser(self.owner, goal=200)
+        self.async_client = AsyncClient()
+
+    def pledge(self, amount):
+        with self.captureOnCommitCallbacks(execute=True):
+            admit_pledge(self.supporter, self.fundraiser, amount=amount)
+
+    def close(self):
+        Fundraiser.objects.filter(pk=self.fundraiser.pk).update(deadline=timezone.now() - timedelta(minutes=1))
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("close_expired_fundraisers", stdout=StringIO())
+
+    async def read_event(self, content):
+        chunk = await anext(content)
+        chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+        fields = dict(line.split(": ", 1) for line in chunk.strip().split("\n"))
+        return fields["id"], json.loads(fields["data"])
+
+    async def test_broker_fans_out_to_each_subscriber(self):
+        first = pubsub.broker.subscribe("test")
+        second = pubsub.broker.subscribe("test")
+        self.assertEqual(pubsub.broker.publish("test", {"n": 1}), 2)
+        self.assertEqual(await first.get(timeout=1), {"n": 1})
+        self.assertEqual(await second.get(timeout=1), {"n": 1})
+        first.close()
+        second.close()
+        self.assertEqual(pubsub.broker.subscriber_count("test"), 0)
+
+    async def test_slow_subscriber_drops_oldest(self):
+        subscription = pubsub.broker.subscribe("test", maxsize=2)
+        for n in range(3):
+            pubsub.broker.publish("test", n)
+        await asyncio.sleep(0)
+        self.assertEqual([await subscription.get(timeout=1) for _ in range(2)], [1, 2])
+        subscription.close()
+
+    async def test_stream_sends_snapshot_then_pledges(self):
+        response = await self.async_client.get(f"/async/fundraisers/{self.fundraiser.pk}/events/")
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        content = aiter(response.streaming_content)
+        self.assertTrue((await anext(content)).startswith(b"retry:"))
+        version, event = await self.read_event(content)
+        self.assertEqual((event["total_pledged"], event["progress"]), (0, 0))
+
+        await sync_to_async(self.pledge)(50)
+        next_version, event = await self.read_event(content)
+        self.assertEqual(int(next_version), int(version) + 1)
+        self.assertEqual((event["total_pledged"], event["pledge_count"], event["progress"]), (50, 1, 25))
+
+        await sync_to_async(self.close)()
+        _, event = await self.read_event(content)
+        self.assertFalse(event["is_open"])
+        with self.assertRaises(StopAsyncIteration):
+            await anext(content)
+        self.assertEqual(pubsub.broker.subscriber_count(), 0)
+
+    async def test_missing_fundraiser(self):
+        response = await self.async_client.get("/async/fundraisers/999/events/")
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(pubsub.broker.subscriber_count(), 0)
+
+    def test_refused_under_wsgi(self):
+        response = self.client.get(f"/async/fundraisers/{self.fundraiser.pk}/events/")
+        self.assertEqual(response.status_code, 501)
+        self.assertFalse(response.streaming)
+        self.assertEqual(pubsub.broker.subscriber_count(), 0)
+
+    def test_no_query_without_subscribers(self):
+        with self.assertNumQueries(0):
+            events.publish_progress(self.fundraiser.pk)
+
+
+@override_settings(REPLICA_DATABASES=["replica"], RESPONSE_CACHE={"ALIAS": "default", "TIMEOUT": 0})
+class ReplicaRoutingTests(FundraiserTestMixin, TestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        cache.clear()
+        self.make_fundraiser(self.make_user("owner"), title="On the primary")
+        replica_owner = get_user_model().objects.db_manager("replica").create_user(username="owner")
+        self.replica_fundraiser = Fundraiser.objects.using("replica").create(
+            title="On the replica", description="", goal=100, image="https://example.com/image.png", owner=replica_owner,
+        )
+        self.writer = APIClient()
+        self.writer.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.make_user('writer')).key}")
+
+    def titles(self, client, path="/fundraisers/"):
+        return [row["title"] for row in json.loads(client.get(path).content)]
+
+    def test_reads_go_to_the_replica(self):
+        self.assertEqual(self.titles(APIClient()), ["On the replica"])
+        self.assertEqual(self.titles(APIClient(), "/async/fundraisers/"), ["On the replica"])
+        # Authenticated too: the token itself is read from the primary.
+        self.assertEqual(self.titles(self.writer), ["On the replica"])
+
+    def test_writer_reads_own_writes_until_sticky_window_ends(self):
+        response = self.writer.post("/fundraisers/", {
+            "title": "Just written", "description": "Fresh", "goal": 10, "image": "https://example.com/image.png",
+        }, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.writer.get(f"/fundraisers/{response.data['id']}/").status_code, 200)
+        self.assertEqual(sorted(self.titles(self.writer)), ["Just written", "On the primary"])
+        self.assertEqual(self.titles(APIClient()), ["On the replica"])
+
+        cache.clear()  # The sticky window has passed.
+        self.assertEqual(self.titles(self.writer), ["On the replica"])
+
+    def test_router(self):
+        router = replicas.ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Fundraiser))
+        token = replicas._replica.set("replica")
+        try:
+            self.assertEqual(router.db_for_read(Fundraiser), "replica")
+            self.assertIsNone(router.db_for_read(Token))
+            self.assertEqual(router.db_for_write(Fundraiser, instance=self.replica_fundraiser), "default")
+        finally:
+            replicas._replica.reset(token)
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_without_replicas_reads_use_the_primary(self):
+        self.assertEqual(self.titles(APIClient()), ["On the primary"])
+
+
+@override_settings(METRICS_SAMPLE_RATE=1, RESPONSE_CACHE={"ALIAS": "default", "TIMEOUT": 0})
+class MetricsTests(FundraiserTestMixin, TestCase):
+    def setUp(self):
+        metrics.reset()
+        owner = self.make_user("owner")
+        for goal in (10, 20):
+            self.make_fundraiser(owner, goal=goal)
+        self.client = APIClient()
+
+    def server_timing(self, response):
+        return dict(
+            (part.split(";")[0], dict(item.split("=", 1) for item in part.split(";")[1:]))
+            for part in response["Server-Timing"].split(", ")
+        )
+
+    def test_server_timing_header(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/fundraisers/")
+        timing = self.server_timing(response)
+        self.assertEqual(timing["db"]["desc"], f'"{len(queries)} queries"')
+        self.assertEqual(set(timing), {"db", "render", "total"})
+        self.assertGreaterEqual(float(timing["total"]["dur"]), float(timing["render"]["dur"]))
+
+    async def test_async_views_are_measured(self):
+        response = await self.async_client.get("/async/fundraisers/")
+        self.assertIn('desc="1 queries"', response["Server-Timing"])
+        self.assertIn('crowdfunding_db_queries_count{view="AsyncFundraiserList"} 1', metrics.expose())
+
+    async def test_async_middleware_returns_the_response(self):
+        async def view(request):
+            return HttpResponse()
+
+        middleware = metrics.MetricsMiddleware(view)
+        response = Response({})
+        self.assertIs(await middleware.process_template_response(None, response), response)
+
+    def test_metrics_endpoint(self):
+        self.client.get("/fundraisers/")
+        self.client.get("/fundraisers/")
+        self.assertIn(self.client.get("/metrics/").status_code, (401, 403))
+
+        self.client.force_authenticate(get_user_model().objects.create_superuser(username="admin"))
+        body = self.client.get("/metrics/").content.decode()
+        self.assertIn("# TYPE crowdfunding_request_duration_seconds histogram", body)
+        self.assertIn('crowdfunding_request_duration_seconds_count{view="FundraiserList"} 2', body)
+        self.assertIn('crowdfunding_db_queries_bucket{view="FundraiserList",le="+Inf"} 2', body)
+        self.assertIn('crowdfunding_render_duration_seconds_count{view="FundraiserList"} 2', body)
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_untouched(self):
+        self.assertNotIn("Server-Timing", self.client.get("/fundraisers/"))
+        self.assertEqual(metrics.expose().count("_count"), 0)
+
+
+class SeedDataTests(TestCase):
+    def seed(self, **options):
+        options = {"users": 30, "fundraisers": 10, "pledges": 300, "comments": 120, "stdout": StringIO(), **options}
+        call_command("seed_data", **options)
+
+    def test_generates_consistent_skewed_data(self):
+        self.seed(max_depth=3)
+
+        self.assertEqual(get_user_model().objects.count(), 30)
+        self.assertEqual(Comment.objects.count(), 120)
+        self.assertFalse(Pledge.objects.filter(supporter=F("fundraiser__owner")).exists())
+        for fundraiser in Fundraiser.objects.annotate(total=Sum("pledges__amount")):
+            self.assertEqual(fundraiser.total_pledged, fundraiser.total or 0)
+            self.assertLessEqual(fundraiser.total_pledged, fundraiser.goal)
+        counts = sorted(Fundraiser.objects.values_list("pledge_count", flat=True), reverse=True)
+        self.assertGreater(counts[0], 3 * counts[len(counts) // 2])
+
+        replies = Comment.objects.exclude(parent=None).select_related("parent")
+        self.assertTrue(replies.exists())
+        self.assertFalse(replies.exclude(fundraiser=F("parent__fundraiser")).exists())
+        self.assertFalse(Comment.objects.filter(parent__parent__parent__parent__isnull=False).exists())
+
+    def test_same_seed_same_data(self):
+        self.seed(prefix="a")
+        first = list(Pledge.objects.order_by("id").values_list("amount", "fundraiser__title"))
+        Pledge.objects.all().delete()
+        self.seed(prefix="b")
+        second = list(Pledge.objects.order_by("id").values_list("amount", "fundraiser__title"))
+        self.assertEqual(first, second)
+
+    def test_benchmark_endpoints_writes_json(self):
+        self.seed()
+        fundraisers = Fundraiser.objects.count()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.json")
+            call_command("benchmark_endpoints", requests=2, warmup=0, output=path, stdout=StringIO(), stderr=StringIO())
+            with open(path) as results_file:
+                results = json.load(results_file)
+            call_command("benchmark_endpoints", requests=1, warmup=0, compare=path, stdout=StringIO(), stderr=StringIO())
+
+        self.assertEqual(results["meta"]["rows"]["fundraisers"], fundraisers)
+        self.assertEqual(results["results"]["GET fundraisers/ page"]["status"], 200)
+        self.assertEqual(results["results"]["POST pledges/"]["status"], 201)
+        self.assertEqual(results["results"]["GET pledges/<int:pk>/"]["queries"], 1)
+        self.assertEqual(Fundraiser.objects.count(), fundraisers)  # Writes were rolled back.
+
+    def test_benchmark_endpoints_rejects_what_it_cannot_time(self):
+        self.seed()
+        with self.assertRaisesMessage(CommandError, "--requests"):
+            call_command("benchmark_endpoints", requests=0, stdout=StringIO(), stderr=StringIO())
+        Fundraiser.objects.update(is_open=False)
+        with self.assertRaisesMessage(CommandError, "closed"):
+            call_command("benchmark_endpoints", stdout=StringIO(), stderr=StringIO())
+
+
+@override_settings(THROTTLES={"ALIAS": "throttles", "RATES": {
+    "pledges.user": ("6/min", 2), "pledges.fundraiser": ("3/min", 3), "contact.ip": "1/hour",
+}})
+class ThrottlingTests(FundraiserTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        caches["throttles"].clear()
+        owner = self.make_user("owner")
+        self.fundraiser = self.make_fundraiser(owner, goal=1000)
+        self.other = self.make_fundraiser(owner, goal=1000)
+        self.alice, self.bob = APIClient(), APIClient()
+        self.alice.force_authenticate(self.make_user("alice"))
+        self.bob.force_authenticate(self.make_user("bob"))
+
+    def pledge(self, client, fundraiser=None):
+        return client.post("/pledges/", {"amount": 1, "fundraiser": (fundraiser or self.fundraiser).pk}, format="json")
+
+    def test_parse_rate(self):
+        self.assertEqual(throttling.parse_rate("30/min"), (2, 30))
+        self.assertEqual(throttling.parse_rate(("30/min", 10)), (2, 10))
+        self.assertEqual(throttling.parse_rate("2/s"), (0.5, 2))
+
+    def test_user_bucket_refills(self):
+        self.assertEqual([self.pledge(self.alice, self.other).status_code for _ in range(2)], [201, 201])
+        with self.assertNumQueries(0):
+            response = self.pledge(self.alice, self.other)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "10")
+        self.assertEqual(self.pledge(self.bob, self.other).status_code, 201)
+        self.assertEqual(self.alice.get("/pledges/").status_code, 200)
+
+        later = time.time() + 20
+        with mock.patch("crowdfunding.throttling.time.time", return_value=later):
+            self.assertEqual(self.pledge(self.alice, self.other).status_code, 201)
+            self.assertEqual(self.pledge(self.alice, self.other).status_code, 429)
+
+    def test_fundraiser_bucket_is_shared_by_everyone(self):
+        self.assertEqual(self.pledge(self.alice).status_code, 201)
+        self.assertEqual(self.pledge(self.bob).status_code, 201)
+        self.assertEqual(self.pledge(self.alice).status_code, 201)
+        self.assertEqual(self.pledge(self.bob).status_code, 429)
+        self.assertEqual(self.pledge(self.alice, self.other).status_code, 429)  # Alice's own bucket is empty.
+
+    def test_contact_is_limited_per_address(self):
+        message = {"name": "A", "email": "a@example.com", "subject": "Hi", "message": "Hello"}
+        self.assertEqual(self.client.post("/contact/", message).status_code, 201)
+        response = self.client.post("/contact/", message)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(int(response["Retry-After"]), 3600)
+        other_address = self.client.post("/contact/", message, REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(other_address.status_code, 201)
+
+    def test_spoofed_forwarded_for_is_ignored(self):
+        # Behind one proxy, only the address it appended identifies the client.
+        message = {"name": "A", "email": "a@example.com", "subject": "Hi", "message": "Hello"}
+        responses = [
+            self.client.post("/contact/", message, HTTP_X_FORWARDED_FOR=f"203.0.113.{n}, 198.51.100.7")
+            for n in range(2)
+        ]
+        self.assertEqual([response.status_code for response in responses], [201, 429])
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, "NUM_PROXIES": 0}):
+            responses = [
+                self.client.post("/contact/", message, HTTP_X_FORWARDED_FOR=f"203.0.113.{n}") for n in range(2)
+            ]
+        self.assertEqual([response.status_code for response in responses], [201, 429])
+
+    def test_deploy_check_wants_a_shared_cache(self):
+        self.assertEqual([error.id for error in throttling.check_shared_cache()], ["crowdfunding.W001"])
+        with override_settings(CACHES={**settings.CACHES, "throttles": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "crowdfunding_throttles",
+        }}):
+            self.assertEqual(throttling.check_shared_cache(), [])
+
+
+class IdempotencyKeyTests(FundraiserTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        caches["throttles"].clear()
+        self.fundraiser = self.make_fundraiser(self.make_user("owner"), goal=100)
+        self.supporter = self.make_user("supporter")
+        self.client = APIClient()
+        self.client.force_authenticate(self.supporter)
+
+    def pledge(self, key, amount=10):
+        return self.client.post(
+            "/pledges/", {"amount": amount, "fundraiser": self.fundraiser.pk}, format="json",
+            headers={"Idempotency-Key": key} if key else {},
+        )
+
+    def test_retry_replays_first_response(self):
+        first = self.pledge("retry-1")
+        self.assertEqual(first.status_code, 201)
+
+        with self.assertNumQueries(1):
+            retry = self.pledge("retry-1")
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Pledge.objects.count(), 1)
+        self.fundraiser.refresh_from_db()
+        self.assertEqual((self.fundraiser.total_pledged, self.fundraiser.pledge_count), (10, 1))
+
+        self.assertEqual(self.pledge("retry-2").status_code, 201)
+        self.assertEqual(self.pledge(None).status_code, 201)
+        self.assertEqual(Pledge.objects.count(), 3)
+
+    @override_settings(THROTTLES={"ALIAS": "throttles", "RATES": {"pledges.user": ("1/hour", 2)}})
+    def test_retries_are_not_throttled(self):
+        first = self.pledge("timed-out")
+        for _ in range(3):
+            with self.assertNumQueries(1):
+                retry = self.pledge("timed-out")
+            self.assertEqual((retry.status_code, retry.content), (201, first.content))
+        # The retries spent no tokens: one is left for a new pledge.
+        self.assertEqual(self.pledge("new").status_code, 201)
+        self.assertEqual(self.pledge("newer").status_code, 429)
+
+    def test_key_reused_for_different_request(self):
+        self.pledge("reused")
+        self.assertEqual(self.pledge("reused", amount=20).status_code, 422)
+        self.assertEqual(Pledge.objects.count(), 1)
+
+    def test_errors_are_not_stored(self):
+        self.assertEqual(self.pledge("fix-and-retry", amount=500).status_code, 400)
+        self.assertEqual(self.pledge("fix-and-retry", amount=50).status_code, 201)
+
+    def test_keys_are_per_endpoint_and_user(self):
+        self.pledge("shared")
+        response = self.client.post("/fundraisers/", {
+            "title": "Blankets", "description": "For the winter", "goal": 50, "image": "https://example.com/image.png",
+        }, format="json", headers={"Idempotency-Key": "shared"})
+        self.assertEqual(response.status_code, 201)
+
+        self.client.force_authenticate(self.make_user("someone-else"))
+        self.assertEqual(self.pledge("shared").status_code, 201)
+        self.assertEqual(Pledge.objects.count(), 2)
+
+    def test_expired_key_runs_again(self):
+        self.pledge("old")
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertNotIn("Idempotent-Replayed", self.pledge("old"))
+        self.assertEqual(Pledge.objects.count(), 2)
+
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        call_command("purge_idempotency_keys", stdout=StringIO())
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_concurrent_duplicate_rolls_back_and_replays(self):
+        first = self.pledge("race")
+        find = idempotency.find
+        # The second request misses the lookup, as if both arrived together.
+        with mock.patch("fundraisers.idempotency.find", autospec=True) as patched:
+            patched.side_effect = lambda *args: None if patched.call_count == 1 else find(*args)
+            retry = self.pledge("race")
+        self.assertEqual(patched.call_count, 2)
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(Pledge.objects.count(), 1)
+        self.fundraiser.refresh_from_db()
+        self.assertEqual(self.fundraiser.total_pledged, 10)
@@ -1,12 +1,20 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path('fundraisers/', views.FundraiserList.as_view()),
     path('fundraisers/<int:pk>/', views.FundraiserDetail.as_view()),
+    path('fundraisers/<int:pk>/analytics/', views.FundraiserAnalytics.as_view()),
+    path('fundraisers/rankings/<slug:kind>/', views.FundraiserRankings.as_view()),
+    path("exports/<slug:kind>/", views.RecordExport.as_view()),
+    path("imports/<slug:kind>/", views.RecordImport.as_view()),
     path("pledges/", views.PledgeList.as_view()),
     path("pledges/<int:pk>/", views.PledgeDetail.as_view()),
     path('comments/', views.CommentList.as_view()),
     path('comments/<int:pk>/', views.CommentDetail.as_view()),
+    path('async/fundraisers/', async_views.AsyncFundraiserList.as_view()),
+    path('async/fundraisers/<int:pk>/', async_views.AsyncFundraiserDetail.as_view()),
+    path('async/fundraisers/<int:pk>/events/', async_views.AsyncFundraiserEvents.as_view()),
+    path('async/comments/', async_views.AsyncCommentList.as_view()),
     path("contact/", views.ContactView.as_view()),
 ]
\ No newline at end of file
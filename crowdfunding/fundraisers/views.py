@@ -1,49 +1,114 @@
+import hashlib
+import os
+from datetime import timedelta
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from django.http import JsonResponse
+
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
 from django.utils import timezone
+
+from crowdfunding.conditional import conditional_get
+from crowdfunding.pagination import KeysetPagination
+from crowdfunding.response_cache import cache_response
+from crowdfunding.throttling import FundraiserThrottle, IPThrottle, UserThrottle
 from .models import Fundraiser, Pledge, Comment
-from .serializers import FundraiserSerializer, FundraiserDetailSerializer, PledgeSerializer, CommentSerializer
+from .serializers import (
+    CommentSerializer,
+    FundraiserDetailSerializer,
+    FundraiserRowSerializer,
+    FundraiserSerializer,
+    PledgeRowSerializer,
+    PledgeSerializer,
+)
 from .permissions import IsOwnerOrReadOnly, IsAuthorOrReadOnly
+from .analytics import STATS, pledge_series
+from . import exports
+from .filters import filter_comments, filter_fundraisers, filter_pledges, parse_bound, parse_count, parse_tree_window
+from .idempotency import idempotent, stored_response
+from .imports import FORMATS, KINDS, import_rows, read_rows
+from .rankings import MAX_HOURS, MAX_LIMIT, RANKINGS
+from .services import PledgeRejected, admit_pledge
 
 
-class FundraiserList(APIView):
-    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+FUNDRAISER_ROWS = FundraiserRowSerializer()
+PLEDGE_ROWS = PledgeRowSerializer()
 
-    def get(self, request):
-        fundraisers = Fundraiser.objects.all()
 
-        is_open = request.query_params.get("is_open")
-        if is_open is not None:
-            fundraisers = fundraisers.filter(is_open=(is_open.lower() == "true"))
+def fast_list_response(request, queryset, rows):
+    # settings.FAST_LIST_SERIALIZERS: same JSON as the DRF serializers, from values() rows.
+    queryset = rows.values(queryset)
+    paginator = KeysetPagination()
+    if paginator.is_requested(request):
+        return paginator.get_paginated_response(rows.serialize(paginator.paginate_queryset(queryset, request)))
+    return Response(rows.serialize(queryset))
+
+
+def fundraiser_validators(pk, request):
+    """ETag and Last-Modified for anything derived from one fundraiser.
+
+    Saving the fundraiser, and every pledge or comment on it, bumps its
+    version and date_updated, so a single-row lookup answers "has it changed?".
+    days_left and computed_is_open change with the clock instead, so the
+    validators also cover how far off the deadline is.
+    """
+    return fundraiser_etag(pk, request, validator_row(pk).first())
+
 
-        goal_lte = request.query_params.get("goal_lte")
-        if goal_lte:
-            fundraisers = fundraisers.filter(goal__lte=int(goal_lte))
+async def afundraiser_validators(pk, request):
+    return fundraiser_etag(pk, request, await validator_row(pk).afirst())
+
+
+def validator_row(pk):
+    return Fundraiser.objects.filter(pk=pk).values_list("version", "date_updated", "deadline")
+
+
+def deadline_state(deadline, now):
+    """(days left, or "closed" once passed; when that last changed) for a deadline."""
+    if deadline is None:
+        return "", None
+    if now >= deadline:
+        return "closed", deadline
+    days = (deadline - now).days
+    return days, deadline - timedelta(days=days + 1)
+
+
+def fundraiser_etag(pk, request, row):
+    if row is None:
+        return None
+    version, date_updated, deadline = row
+    state, changed = deadline_state(deadline, timezone.now())
+    query = hashlib.sha256(request.META.get("QUERY_STRING", "").encode()).hexdigest()[:12]
+    return f"{request.path}:{pk}:{version}:{state}:{query}", max(date_updated, changed or date_updated)
+
+
+class FundraiserList(APIView):
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
-        goal_gte = request.query_params.get("goal_gte")
-        if goal_gte:
-            fundraisers = fundraisers.filter(goal__gte=int(goal_gte))
+    @cache_response
+    def get(self, request):
+        fundraisers = Fundraiser.objects.for_list()
 
-        owner = request.query_params.get("owner")
-        if owner:
-            fundraisers = fundraisers.filter(owner__id=int(owner))
+        try:
+            fundraisers = filter_fundraisers(fundraisers, request.query_params)
+        except ValueError:
+            return Response({"detail": "Invalid filter value."}, status=status.HTTP_400_BAD_REQUEST)
 
-        has_deadline = request.query_params.get("has_deadline")
-        if has_deadline is not None:
-            if has_deadline.lower() == "true":
-                fundraisers = fundraisers.exclude(deadline=None)
-            else:
-                fundraisers = fundraisers.filter(deadline=None)
+        if settings.FAST_LIST_SERIALIZERS:
+            return fast_list_response(request, fundraisers, FUNDRAISER_ROWS)
 
-        search = request.query_params.get("search")
-        if search:
-            fundraisers = fundraisers.filter(title__icontains=search) | fundraisers.filter(description__icontains=search)
+        paginator = KeysetPagination()
+        if paginator.is_requested(request):
+            page = paginator.paginate_queryset(fundraisers, request)
+            serializer = FundraiserSerializer(page, many=True, context={"request": request})
+            return paginator.get_paginated_response(serializer.data)
 
         serializer = FundraiserSerializer(fundraisers, many=True, context={"request": request})
         return Response(serializer.data)
 
+    @idempotent
     def post(self, request):
         serializer = FundraiserSerializer(data=request.data, context={"request": request})
         if serializer.is_valid():
@@ -55,16 +120,21 @@ class FundraiserList(APIView):
 class FundraiserDetail(APIView):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
 
-    def get_object(self, pk):
+    def get_object(self, pk, queryset=Fundraiser.objects):
         try:
-            fundraiser = Fundraiser.objects.get(pk=pk)
+            fundraiser = queryset.get(pk=pk)
             self.check_object_permissions(self.request, fundraiser)
             return fundraiser
         except Fundraiser.DoesNotExist:
             return None
 
+    def get_validators(self, request, pk):
+        return fundraiser_validators(pk, request)
+
+    @conditional_get
+    @cache_response
     def get(self, request, pk):
-        fundraiser = self.get_object(pk)
+        fundraiser = self.get_object(pk, Fundraiser.objects.for_detail())
         if fundraiser is None:
             return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
         serializer = FundraiserDetailSerializer(fundraiser, context={"request": request})
@@ -91,19 +161,107 @@ class FundraiserDetail(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class PledgeList(APIView):
+class FundraiserRankings(APIView):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
-    def get(self, request):
-        pledges = Pledge.objects.all()
+    @cache_response
+    def get(self, request, kind):
+        ranking = RANKINGS.get(kind)
+        if ranking is None:
+            return Response({"detail": f"Unknown ranking. Choose from: {', '.join(RANKINGS)}."}, status=status.HTTP_404_NOT_FOUND)
 
-        fundraiser_id = request.query_params.get("fundraiser")
-        if fundraiser_id:
-            pledges = pledges.filter(fundraiser__id=int(fundraiser_id))
+        try:
+            limit = parse_count(request.query_params.get("limit"), minimum=1, maximum=MAX_LIMIT) or 10
+            hours = parse_count(request.query_params.get("hours"), minimum=1, maximum=MAX_HOURS) or 24
+        except ValueError:
+            return Response({"detail": "Invalid filter value."}, status=status.HTTP_400_BAD_REQUEST)
+        if kind == "trending":
+            fundraisers = ranking(limit, hours=hours)
+        else:
+            fundraisers = ranking(limit)
+
+        serializer = FundraiserSerializer(fundraisers, many=True, context={"request": request})
+        data = serializer.data
+        if kind == "trending":
+            for row, fundraiser in zip(data, fundraisers):
+                row["recent_pledged"] = fundraiser.recent_pledged
+        return Response(data)
+
+
+class FundraiserAnalytics(APIView):
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+
+    @cache_response
+    def get(self, request, pk):
+        if not Fundraiser.objects.filter(pk=pk).exists():
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        interval = request.query_params.get("interval", "day")
+        if interval not in STATS:
+            return Response({"detail": "interval must be 'hour' or 'day'."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            start = parse_bound(request.query_params.get("start"))
+            end = parse_bound(request.query_params.get("end"), end=True)
+        except ValueError:
+            return Response({"detail": "start and end must be ISO dates or datetimes."}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "fundraiser": pk,
+            "interval": interval,
+            "buckets": pledge_series(pk, interval, start, end),
+        })
+
+
+class RecordImport(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request, kind):
+        if kind not in KINDS:
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"detail": "Upload the records as 'file'."}, status=status.HTTP_400_BAD_REQUEST)
+        format = request.query_params.get("file_format") or os.path.splitext(upload.name)[1].lstrip(".").lower()
+        if format not in FORMATS:
+            return Response({"detail": "file_format must be 'csv' or 'jsonl'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Iterating the upload streams it line by line from memory or the temp file.
+        lines = (line.decode("utf-8-sig") for line in upload)
+        dry_run = request.query_params.get("dry_run", "").lower() == "true"
+        report = import_rows(kind, read_rows(lines, format), dry_run=dry_run)
+        return Response(report, status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED)
+
+
+class RecordExport(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, kind):
+        if kind not in exports.KINDS:
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        format = request.query_params.get("file_format", "csv")
+        try:
+            lines = exports.export_lines(kind, request.query_params, format)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(lines, content_type=exports.CONTENT_TYPES[format])
+        response["Content-Disposition"] = f'attachment; filename="{kind}.{format}"'
+        return response
+
+
+class PledgeList(APIView):
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    throttle_classes = [UserThrottle, FundraiserThrottle]
+    throttle_scope = "pledges"
 
-        supporter_id = request.query_params.get("supporter")
-        if supporter_id:
-            pledges = pledges.filter(supporter__id=int(supporter_id))
+    def throttle_exempt(self, request):
+        return request.method == "POST" and stored_response(request) is not None
+
+    @cache_response
+    def get(self, request):
+        pledges = Pledge.objects.select_related("supporter")
 
         mine = request.query_params.get("mine")
         if mine and mine.lower() == "true":
@@ -111,21 +269,24 @@ class PledgeList(APIView):
                 return Response({"detail": "Authentication required."}, status=status.HTTP_401_UNAUTHORIZED)
             pledges = pledges.filter(supporter=request.user)
 
-        anonymous = request.query_params.get("anonymous")
-        if anonymous is not None:
-            pledges = pledges.filter(anonymous=(anonymous.lower() == "true"))
+        try:
+            pledges = filter_pledges(pledges, request.query_params)
+        except ValueError:
+            return Response({"detail": "Invalid filter value."}, status=status.HTTP_400_BAD_REQUEST)
 
-        amount_lte = request.query_params.get("amount_lte")
-        if amount_lte:
-            pledges = pledges.filter(amount__lte=int(amount_lte))
+        if settings.FAST_LIST_SERIALIZERS:
+            return fast_list_response(request, pledges, PLEDGE_ROWS)
 
-        search = request.query_params.get("search")
-        if search:
-            pledges = pledges.filter(comment__icontains=search)
+        paginator = KeysetPagination()
+        if paginator.is_requested(request):
+            page = paginator.paginate_queryset(pledges, request)
+            serializer = PledgeSerializer(page, many=True, context={"request": request})
+            return paginator.get_paginated_response(serializer.data)
 
         serializer = PledgeSerializer(pledges, many=True, context={"request": request})
         return Response(serializer.data)
 
+    @idempotent
     def post(self, request):
         if not request.user.is_authenticated:
             return Response({"detail": "You must be logged in to make a pledge."}, status=status.HTTP_401_UNAUTHORIZED)
@@ -134,32 +295,10 @@ class PledgeList(APIView):
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        fundraiser = serializer.validated_data["fundraiser"]
-        amount = serializer.validated_data["amount"]
-
-        if fundraiser.owner == request.user:
-            return Response({"detail": "You cannot pledge to your own fundraiser."}, status=status.HTTP_400_BAD_REQUEST)
-
-        if fundraiser.deadline and timezone.now() >= fundraiser.deadline:
-            fundraiser.is_open = False
-            fundraiser.save(update_fields=["is_open"])
-            return Response({"detail": "This fundraiser has reached its deadline and is now closed."}, status=status.HTTP_400_BAD_REQUEST)
-
-        total_pledged = fundraiser.total_pledged()
-
-        if total_pledged >= fundraiser.goal:
-            fundraiser.is_open = False
-            fundraiser.save(update_fields=["is_open"])
-            return Response({"detail": "This fundraiser has already reached its target and is now closed."}, status=status.HTTP_400_BAD_REQUEST)
-
-        if total_pledged + amount > fundraiser.goal:
-            return Response({"detail": "This fundraiser only needs the remaining target amount."}, status=status.HTTP_400_BAD_REQUEST)
-
-        pledge = serializer.save(supporter=request.user)
-
-        if fundraiser.total_pledged() >= fundraiser.goal:
-            fundraiser.is_open = False
-            fundraiser.save(update_fields=["is_open"])
+        try:
+            pledge = admit_pledge(request.user, **serializer.validated_data)
+        except PledgeRejected as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
         return Response(PledgeSerializer(pledge, context={"request": request}).data, status=status.HTTP_201_CREATED)
 
@@ -169,7 +308,7 @@ class PledgeDetail(APIView):
 
     def get_object(self, pk):
         try:
-            return Pledge.objects.get(pk=pk)
+            return Pledge.objects.select_related("supporter").get(pk=pk)
         except Pledge.DoesNotExist:
             return None
 
@@ -188,29 +327,52 @@ class PledgeDetail(APIView):
 
 class CommentList(APIView):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    throttle_classes = [UserThrottle, FundraiserThrottle]
+    throttle_scope = "comments"
+
+    def get_validators(self, request):
+        try:
+            fundraiser_id = int(request.query_params.get("fundraiser") or "")
+        except ValueError:
+            return None  # No ETag; get() answers 400 for a malformed id.
+        return fundraiser_validators(fundraiser_id, request)
 
+    @conditional_get
+    @cache_response
     def get(self, request):
-        comments = Comment.objects.all()
+        comments = Comment.objects.select_related("author")
 
         fundraiser_id = request.query_params.get("fundraiser")
-        if fundraiser_id:
-            comments = comments.filter(fundraiser_id=fundraiser_id)
-
-        author_id = request.query_params.get("author")
-        if author_id:
-            comments = comments.filter(author__id=int(author_id))
-
-        anonymous = request.query_params.get("anonymous")
-        if anonymous is not None:
-            comments = comments.filter(anonymous=(anonymous.lower() == "true"))
-
-        search = request.query_params.get("search")
-        if search:
-            comments = comments.filter(content__icontains=search)
+        tree = request.query_params.get("tree")
+        try:
+            if fundraiser_id and tree and tree.lower() == "true":
+                return self.get_tree(request, int(fundraiser_id))
+            comments = filter_comments(comments, request.query_params)
+        except ValueError:
+            return Response({"detail": "Invalid filter value."}, status=status.HTTP_400_BAD_REQUEST)
+
+        paginator = KeysetPagination()
+        if paginator.is_requested(request):
+            page = paginator.paginate_queryset(comments, request)
+            serializer = CommentSerializer(page, many=True, context={"request": request})
+            return paginator.get_paginated_response(serializer.data)
 
         serializer = CommentSerializer(comments, many=True, context={"request": request})
         return Response(serializer.data)
 
+    def get_tree(self, request, fundraiser_id):
+        offset, limit, max_depth = parse_tree_window(request.query_params)  # ValueError: get() answers 400.
+        roots, children = Comment.load_tree(fundraiser_id)
+        roots = roots[offset:offset + limit] if limit else roots[offset:]
+
+        context = {
+            "request": request,
+            "children": children,
+            "max_depth": max_depth,
+        }
+        serializer = CommentSerializer(roots, many=True, context=context)
+        return Response(serializer.data)
+
     def post(self, request):
         if not request.user.is_authenticated:
             return Response({"detail": "You must be logged in to comment."}, status=status.HTTP_401_UNAUTHORIZED)
@@ -266,6 +428,8 @@ class CommentDetail(APIView):
 
 class ContactView(APIView):
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [IPThrottle]
+    throttle_scope = "contact"
 
     def post(self, request):
         name = (request.data.get("name") or "").strip()
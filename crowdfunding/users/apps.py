@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from crowdfunding import search
+        from . import signals  # noqa: F401
+        from .models import CustomUser
+
+        search.register(CustomUser, ["username", "email"])
@@ -0,0 +1,108 @@
+"""Token authentication with an in-process cache of token -> user.
+
+DRF's TokenAuthentication joins authtoken_token to the user table on every
+authenticated request. This keeps recently used tokens in a small LRU per
+process, keyed by a hash of the token so raw keys aren't used as dict keys.
+
+Entries are dropped when a token is deleted or its user is saved (see
+users.signals), and in any case after TOKEN_AUTH_CACHE["TIMEOUT"] seconds.
+The signals only reach the process that made the change. Revoking a token or
+deactivating a user therefore takes up to that timeout to reach other
+workers, which keep accepting the token until then, and the same goes for
+changes that send no signals, such as QuerySet.update(is_active=False).
+Lower the timeout, or set it to 0, if that lag is too long.
+"""
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+
+
+def hash_key(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class TokenCache:
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        digest = hash_key(key)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None and entry[2] <= time.monotonic():
+                del self._entries[digest]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+        # Each request gets its own instances to mutate.
+        user, token = copy.copy(entry[0]), copy.copy(entry[1])
+        token.user = user
+        return user, token
+
+    def set(self, key, user, token):
+        if not self.timeout or not self.max_entries:
+            return
+        digest = hash_key(key)
+        with self._lock:
+            self._entries[digest] = (copy.copy(user), copy.copy(token), time.monotonic() + self.timeout)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(hash_key(key), None)
+
+    def discard_user(self, user_id):
+        with self._lock:
+            for digest in [digest for digest, (user, _, _) in self._entries.items() if user.pk == user_id]:
+                del self._entries[digest]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "timeout": self.timeout,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else None,
+            }
+
+
+token_cache = TokenCache(settings.TOKEN_AUTH_CACHE["MAX_ENTRIES"], settings.TOKEN_AUTH_CACHE["TIMEOUT"])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None and cached[0].is_active:
+            return cached
+        if cached is not None:
+            token_cache.discard(key)  # Let DRF reject it as usual.
+
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token)
+        return user, token
+
+
@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+
+from users.authentication import CachedTokenAuthentication, token_cache
+from users.models import CustomUser
+from users.views import CustomUserDetail
+
+
+class Command(BaseCommand):
+    help = "Compare queries and time per authenticated request with and without the token cache. Everything is rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--requests", type=int, default=5_000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            users = CustomUser.objects.bulk_create(
+                CustomUser(username=f"benchmark-auth-{i}") for i in range(options["users"])
+            )
+            tokens = [Token.objects.create(user=user).key for user in users]
+
+            self.stdout.write(f"{'authentication':<16} {'queries/req':>11} {'req/s':>9} {'hit rate':>9}")
+            for label, authentication in [("drf", TokenAuthentication), ("cached", CachedTokenAuthentication)]:
+                token_cache.clear()
+                view = CustomUserDetail.as_view(authentication_classes=[authentication])
+                queries, seconds = self.run(view, users, tokens, options["requests"])
+                hit_rate = token_cache.stats()["hit_rate"] if authentication is CachedTokenAuthentication else None
+                self.stdout.write(
+                    f"{label:<16} {queries / options['requests']:>11.2f} {options['requests'] / seconds:>9.0f} "
+                    f"{'-' if hit_rate is None else f'{hit_rate:.1%}':>9}"
+                )
+            transaction.set_rollback(True)
+        token_cache.clear()
+
+    def run(self, view, users, tokens, count):
+        factory = APIRequestFactory()
+        requests = [
+            (factory.get(f"/users/{users[i % len(users)].pk}/", HTTP_AUTHORIZATION=f"Token {tokens[i % len(tokens)]}"),
+             users[i % len(users)].pk)
+            for i in range(count)
+        ]
+        queries = 0
+
+        def count_query(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_query):
+            started = time.perf_counter()
+            for request, pk in requests:
+                response = view(request, pk=pk)
+                assert response.status_code == 200, response.status_code
+            seconds = time.perf_counter() - started
+        return queries, seconds
@@ -0,0 +1,14 @@
+from django.db import migrations
+
+import crowdfunding.search
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_customuser_user_joined_idx'),
+    ]
+
+    operations = [
+        crowdfunding.search.CreateSearchIndex('customuser', ['username', 'email']),
+    ]
@@ -2,5 +2,10 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 
 class CustomUser(AbstractUser):
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=["date_joined", "id"], name="user_joined_idx"),
+        ]
+
     def __str__(self):
         return self.username
\ No newline at end of file
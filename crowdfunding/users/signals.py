@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_cache
+from .models import CustomUser
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    token_cache.discard(instance.key)
+
+
+@receiver(post_save, sender=CustomUser)
+def forget_saved_user_tokens(sender, instance, **kwargs):
+    # Deactivation, a password change or any other edit: re-read the user.
+    token_cache.discard_user(instance.pk)
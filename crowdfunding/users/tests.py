@@ -1,3 +1,93 @@
+import time
+from unittest import mock
+
 from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+
+from .authentication import CachedTokenAuthentication, TokenCache, token_cache
+from .models import CustomUser
+
+
+class CustomUserListTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        for username, email in [("alice", "alice@shelter.org"), ("bob", "bob@example.com"), ("carol", "carol@shelter.org")]:
+            CustomUser.objects.create_user(username=username, email=email)
+
+    def test_search_matches_username_and_email(self):
+        response = self.client.get("/users/", {"search": "shelter"})
+        self.assertEqual(sorted(row["username"] for row in response.data), ["alice", "carol"])
+
+        response = self.client.get("/users/", {"search": "bob"})
+        self.assertEqual([row["username"] for row in response.data], ["bob"])
+
+    def test_keyset_pagination(self):
+        first = self.client.get("/users/", {"page_size": 2})
+        self.assertEqual([row["username"] for row in first.data["results"]], ["carol", "bob"])
+
+        second = self.client.get(first.data["next"])
+        self.assertEqual([row["username"] for row in second.data["results"]], ["alice"])
+        self.assertIsNone(second.data["next"])
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = CustomUser.objects.create_user(username="alice")
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def authenticate(self, key=None):
+        return CachedTokenAuthentication().authenticate_credentials(key or self.token.key)
+
+    def test_second_lookup_skips_the_query(self):
+        with self.assertNumQueries(1):
+            self.authenticate()
+        with self.assertNumQueries(0):
+            user, token = self.authenticate()
+        self.assertEqual((user.pk, token.key), (self.user.pk, self.token.key))
+        self.assertEqual(token_cache.stats()["hit_rate"], 0.5)
+
+    def test_returns_separate_instances(self):
+        self.authenticate()
+        first, _ = self.authenticate()
+        first.username = "mallory"
+        self.assertEqual(self.authenticate()[0].username, "alice")
+
+    def test_deleted_token_is_rejected(self):
+        self.assertEqual(self.client.get(f"/users/{self.user.pk}/").status_code, 200)
+        self.token.delete()
+        self.assertEqual(self.client.get(f"/users/{self.user.pk}/").status_code, 401)
+
+    def test_deactivated_user_is_rejected(self):
+        self.assertEqual(self.client.get(f"/users/{self.user.pk}/").status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(f"/users/{self.user.pk}/").status_code, 401)
+
+    def test_inactive_cached_user_is_rejected(self):
+        CustomUser.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.user.is_active = False
+        token_cache.set(self.token.key, self.user, self.token)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+        self.assertEqual(token_cache.stats()["entries"], 0)
+
+    def test_entries_expire(self):
+        self.authenticate()
+        with mock.patch("users.authentication.time.monotonic", return_value=time.monotonic() + 3600):
+            with self.assertNumQueries(1):
+                self.authenticate()
 
-# Create your tests here.
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = TokenCache(max_entries=2, timeout=60)
+        for key in ("a", "b"):
+            cache.set(key, self.user, self.token)
+        cache.get("a")
+        cache.set("c", self.user, self.token)
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertEqual(cache.stats()["evictions"], 1)
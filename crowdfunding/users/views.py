@@ -4,23 +4,32 @@ from django.shortcuts import render
 from django.http import Http404
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status
+from rest_framework import generics, permissions, status
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.authtoken.models import Token
+from crowdfunding.pagination import KeysetPagination
+from crowdfunding.search import search as full_text_search
+from crowdfunding.throttling import IPThrottle
+from .authentication import token_cache
 from .models import CustomUser
-from .serializers import CustomUserSerializer
+from .serializers import CustomUserSerializer, UserSignupSerializer
 
 class CustomUserList(APIView):
+    throttle_classes = [IPThrottle]
+    throttle_scope = "signup"
+
     def get(self, request):
         users = CustomUser.objects.all()
         search = request.query_params.get("search")
         if search:
-            users = users.filter(
-                username__icontains=search
-                ) | users.filter(
-                    email__icontains=search
-                )
-        
+            users = full_text_search(users, search)
+
+        paginator = KeysetPagination(field="date_joined")
+        if paginator.is_requested(request):
+            page = paginator.paginate_queryset(users, request)
+            serializer = CustomUserSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
+
         serializer = CustomUserSerializer(users, many=True)
         return Response(serializer.data)
 
@@ -66,4 +75,13 @@ class CustomAuthToken(ObtainAuthToken):
 
 class SignupView(generics.CreateAPIView):
     permission_classes = [permissions.AllowAny]
-    serializer_class = UserSignupSerializer
\ No newline at end of file
+    throttle_classes = [IPThrottle]
+    throttle_scope = "signup"
+    serializer_class = UserSignupSerializer
+
+class TokenCacheStats(APIView):
+    # Counts are for the process that serves this request.
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(token_cache.stats())